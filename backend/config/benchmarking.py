@@ -0,0 +1,16 @@
+"""Helpers shared by the benchmark management commands."""
+from django.conf import settings
+from django.test import override_settings
+
+
+def isolated_caches():
+    """
+    Swaps every cache alias for a private in-memory one while a benchmark runs.
+
+    The benchmarks clear the cache between runs; doing that to the configured
+    aliases would flush a Redis or Memcached the site is serving from.
+    """
+    return override_settings(CACHES={
+        alias: {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": f"benchmark-{alias}"}
+        for alias in settings.CACHES
+    })
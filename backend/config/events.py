@@ -0,0 +1,139 @@
+"""
+Publish/subscribe for the Server-Sent Events streams.
+
+Publishers are ordinary, usually synchronous, Django code. Subscribers are SSE
+connections waiting on the worker's event loop, one bounded queue each. The
+``EVENTS_BACKEND`` carries messages to the subscribers: LocalBackend delivers
+within the process, RedisBackend relays through Redis pub/sub so that every
+worker sees every event.
+"""
+import asyncio
+import logging
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+from config.renderers import ORJSONRenderer
+
+try:
+    import redis
+    import redis.asyncio as aioredis
+except ImportError:
+    redis = aioredis = None
+
+logger = logging.getLogger(__name__)
+
+
+def encode_event(event, data):
+    return b"event: " + event.encode() + b"\ndata: " + ORJSONRenderer().render(data) + b"\n\n"
+
+
+class Subscription:
+    def __init__(self, hub, channels):
+        self.hub = hub
+        self.channels = channels
+        self.queue = asyncio.Queue(maxsize=settings.EVENTS_QUEUE_SIZE)
+
+    def deliver(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # A client this far behind is cut off; None tells its stream to close so it reconnects.
+            self.close()
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+
+class Hub:
+    """Fans messages out to the subscriptions of one process; only touched from its event loop."""
+
+    def __init__(self, backend_path):
+        self.subscriptions = {}
+        self.loop = None
+        self.backend = import_string(backend_path)(self)
+
+    def subscribe(self, channels):
+        self.loop = asyncio.get_running_loop()
+        self.backend.start()
+        subscription = Subscription(self, channels)
+        for channel in channels:
+            self.subscriptions.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        for channel in subscription.channels:
+            subscribers = self.subscriptions.get(channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self.subscriptions[channel]
+
+    def publish(self, channel, event, data):
+        """Encodes the event once and hands it to the backend; safe to call from any thread."""
+        self.backend.publish(channel, encode_event(event, data))
+
+    def dispatch(self, channel, message):
+        for subscription in list(self.subscriptions.get(channel, ())):
+            subscription.deliver(message)
+
+    def dispatch_threadsafe(self, channel, message):
+        loop = self.loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self.dispatch, channel, message)
+
+
+class LocalBackend:
+    def __init__(self, hub):
+        self.hub = hub
+
+    def start(self):
+        pass
+
+    def publish(self, channel, message):
+        self.hub.dispatch_threadsafe(channel, message)
+
+
+class RedisBackend:
+    prefix = "events:"
+
+    def __init__(self, hub):
+        if redis is None:
+            raise ImproperlyConfigured("RedisBackend requires the redis package.")
+        self.hub = hub
+        self.client = redis.Redis.from_url(settings.EVENTS_REDIS_URL)
+        self.listener = None
+
+    def start(self):
+        if self.listener is None or self.listener.done():
+            self.listener = asyncio.get_running_loop().create_task(self.listen())
+
+    def publish(self, channel, message):
+        self.client.publish(self.prefix + channel, message)
+
+    async def listen(self):
+        pubsub = aioredis.Redis.from_url(settings.EVENTS_REDIS_URL).pubsub()
+        await pubsub.psubscribe(self.prefix + "*")
+        try:
+            async for item in pubsub.listen():
+                if item["type"] == "pmessage":
+                    self.hub.dispatch(item["channel"].decode()[len(self.prefix):], item["data"])
+        except Exception:
+            logger.exception("Event listener stopped; it restarts with the next subscription.")
+            raise
+        finally:
+            await pubsub.aclose()
+
+
+_hub = None
+
+
+def get_hub():
+    global _hub
+    if _hub is None:
+        _hub = Hub(settings.EVENTS_BACKEND)
+    return _hub
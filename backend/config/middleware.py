@@ -0,0 +1,289 @@
+import gzip
+import hashlib
+import json
+import logging
+import random
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import JsonResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+from config.routers import RoutingState
+from config.throttling import SlidingWindowLimiter, get_identity, get_store, parse_rate
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger("config.sql")
+
+IN_LIST_RE = re.compile(r"%s(?:\s*,\s*%s)+")
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+current_recorder = ContextVar("current_recorder", default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    recorder = current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        recorder.duration += time.perf_counter() - started
+        recorder.statements[sql] += 1
+
+
+def install_wrapper(connection, **kwargs):
+    # Connections are per thread, so the wrapper is attached as each one is
+    # created; the context variable carries the recorder into sync_to_async threads.
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.statements = Counter()
+        self.duration = 0.0
+
+    @contextmanager
+    def installed(self):
+        for connection in connections.all(initialized_only=True):
+            install_wrapper(connection)
+        token = current_recorder.set(self)
+        try:
+            yield self
+        finally:
+            current_recorder.reset(token)
+
+    @property
+    def count(self):
+        return sum(self.statements.values())
+
+    def repeated_shapes(self):
+        shapes = Counter()
+        for sql, count in self.statements.items():
+            shapes[IN_LIST_RE.sub("%s...", sql)] += count
+        return [(shape, count) for shape, count in shapes.most_common() if count > 1]
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Records the SQL run by a sample of requests.
+
+    Sampled responses get a ``Server-Timing`` header and a structured log line.
+    Views that repeat one query shape more than ``SQL_REPEAT_THRESHOLD`` times,
+    the usual N+1 signature, are logged as warnings. Requests that are not
+    sampled pay at most for a random draw; sampling is off unless
+    ``SQL_SAMPLE_RATE`` is set.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = settings.SQL_SAMPLE_RATE
+        self.repeat_threshold = settings.SQL_REPEAT_THRESHOLD
+        connection_created.connect(install_wrapper, dispatch_uid="config.middleware.install_wrapper")
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.should_sample():
+            return self.get_response(request)
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with recorder.installed():
+            response = self.get_response(request)
+        self.report(request, response, recorder, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        if not self.should_sample():
+            return await self.get_response(request)
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with recorder.installed():
+            response = await self.get_response(request)
+        self.report(request, response, recorder, time.perf_counter() - started)
+        return response
+
+    def should_sample(self):
+        return self.sample_rate >= 1 or (self.sample_rate > 0 and random.random() < self.sample_rate)
+
+    def report(self, request, response, recorder, elapsed):
+        db_ms = recorder.duration * 1000
+        response["Server-Timing"] = (
+            f'db;dur={db_ms:.2f};desc="{recorder.count} queries", total;dur={elapsed * 1000:.2f}'
+        )
+        match = getattr(request, "resolver_match", None)
+        view = match.view_name if match else None
+        repeated = recorder.repeated_shapes()
+        logger.info(json.dumps({
+            "method": request.method,
+            "path": request.path,
+            "view": view,
+            "status": response.status_code,
+            "queries": recorder.count,
+            "db_ms": round(db_ms, 2),
+            "total_ms": round(elapsed * 1000, 2),
+            "repeated": [{"sql": shape[:200], "count": count} for shape, count in repeated[:3]],
+        }))
+        if repeated and repeated[0][1] > self.repeat_threshold:
+            shape, count = repeated[0]
+            logger.warning("Possible N+1 in %s: query repeated %d times: %s", view, count, shape[:500])
+
+
+def compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+def negotiate_encoding(accept_encoding):
+    """Picks br or gzip from an Accept-Encoding header, honouring q-values; None if neither is acceptable."""
+    weights = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        weight = 1.0
+        if params.strip().startswith("q="):
+            try:
+                weight = float(params.strip()[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding.strip().lower()] = weight
+    candidates = ("br", "gzip") if brotli else ("gzip",)
+    scored = [(weights.get(coding, weights.get("*", 0.0)), coding) for coding in candidates]
+    weight, coding = max(scored, key=lambda item: item[0])
+    return coding if weight > 0 else None
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Compresses JSON and text responses with brotli or gzip, as negotiated by ``Accept-Encoding``.
+
+    Bodies shorter than ``COMPRESSION_MIN_SIZE`` are sent as they are. Responses
+    flagged with ``cache_compressed`` (the cached feed and detail payloads) keep
+    their compressed bytes in the cache under a digest of the body, so each
+    encoding of a given page is computed once rather than on every request.
+    """
+
+    def process_response(self, request, response):
+        if (response.streaming or response.has_header("Content-Encoding")
+                or len(response.content) < settings.COMPRESSION_MIN_SIZE
+                or not response.get("Content-Type", "").startswith(COMPRESSIBLE_TYPES)):
+            return response
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = negotiate_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if encoding is None:
+            return response
+
+        if getattr(response, "cache_compressed", False):
+            key = f"compressed:{encoding}:{hashlib.sha256(response.content).hexdigest()}"
+            compressed = cache.get(key)
+            if compressed is None:
+                compressed = compress(response.content, encoding)
+                cache.set(key, compressed, timeout=settings.COMPRESSION_CACHE_TIMEOUT)
+        else:
+            compressed = compress(response.content, encoding)
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response["Content-Length"] = str(len(compressed))
+        response["Content-Encoding"] = encoding
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        return response
+
+
+class ReplicaPinningMiddleware:
+    """
+    Gives PrimaryReplicaRouter its per-request state and keeps read-your-writes for each client.
+
+    Clients are identified by a digest of their Authorization header, or by their
+    address when anonymous. A request that writes pins that client's reads to the
+    primary for ``REPLICA_STICKY_SECONDS``, long enough for the replicas to catch up.
+    The pin lives in the "shared" cache, so it holds whichever worker serves the next read.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+        key = self.pin_key(request)
+        with RoutingState(pinned=caches["shared"].get(key) is not None).active() as state:
+            response = self.get_response(request)
+        if state.wrote:
+            caches["shared"].set(key, True, timeout=settings.REPLICA_STICKY_SECONDS)
+        return response
+
+    async def __acall__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return await self.get_response(request)
+        key = self.pin_key(request)
+        with RoutingState(pinned=await caches["shared"].aget(key) is not None).active() as state:
+            response = await self.get_response(request)
+        if state.wrote:
+            await caches["shared"].aset(key, True, timeout=settings.REPLICA_STICKY_SECONDS)
+        return response
+
+    @staticmethod
+    def pin_key(request):
+        client = request.META.get("HTTP_AUTHORIZATION") or request.META.get("REMOTE_ADDR", "")
+        return f"db:pinned:{hashlib.sha256(client.encode()).hexdigest()}"
+
+
+class ThrottleMiddleware(MiddlewareMixin):
+    """
+    Rejects requests over the limits in ``THROTTLE_RULES`` with a 429 and a ``Retry-After`` header.
+
+    Rules map URL names to ``{scope: rate}`` for the methods in ``THROTTLE_METHODS``;
+    the scope is ``ip``, ``user`` (the JWT's user id, or the address when
+    anonymous) or ``endpoint`` (all clients together). The check runs before the
+    view, so a rejected login costs no password hash and a rejected comment no query.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.limiter = SlidingWindowLimiter(get_store(settings.THROTTLE_STORE))
+        self.rules = {
+            name: [(scope, parse_rate(rate)) for scope, rate in limits.items()]
+            for name, limits in settings.THROTTLE_RULES.items()
+        }
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not settings.THROTTLE_ENABLED or request.method not in settings.THROTTLE_METHODS:
+            return None
+        name = request.resolver_match.url_name
+        retry_after = 0
+        for scope, rate in self.rules.get(name, ()):
+            key = f"{name}:{request.method}:{get_identity(request, scope)}:{rate.limit}/{rate.window}"
+            retry_after = max(retry_after, self.limiter.hit(key, rate))
+        if not retry_after:
+            return None
+        response = JsonResponse({"error": "Too many requests, retry later."}, status=429)
+        response["Retry-After"] = str(retry_after)
+        return response
@@ -0,0 +1,53 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+current_routing = ContextVar("current_routing", default=None)
+
+
+class RoutingState:
+    """Per-request routing state: whether reads are pinned to the primary and whether anything was written."""
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+
+    @contextmanager
+    def active(self):
+        token = current_routing.set(self)
+        try:
+            yield self
+        finally:
+            current_routing.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """
+    Sends reads of the news app to a random replica from ``DATABASE_REPLICAS`` and everything else to the primary.
+
+    Replicas are only used while a request is being served by ReplicaPinningMiddleware,
+    so management commands and background work always read what they just wrote.
+    Once a request writes, its remaining reads, and those of the same client for
+    ``REPLICA_STICKY_SECONDS`` afterwards, stay on the primary.
+    """
+    route_app_labels = {"news"}
+
+    def db_for_read(self, model, **hints):
+        state = current_routing.get()
+        replicas = settings.DATABASE_REPLICAS
+        if (state is None or state.pinned or not replicas or model._meta.app_label not in self.route_app_labels
+                or connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = current_routing.get()
+        if state is not None:
+            state.pinned = state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
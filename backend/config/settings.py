@@ -10,11 +10,13 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 import os
+import sys
+import tempfile
 from datetime import timedelta
 from pathlib import Path
 
 import django
-from decouple import config
+from decouple import Csv, config
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 from django.utils.encoding import smart_str
 from django.utils.translation import gettext
@@ -30,6 +32,7 @@ SECRET_KEY = 'django-insecure-2$smd)9y(#7#28$b&frrsq3%xl0^+o*!571js9jflk*u&!c5uo
 
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True
+TESTING = sys.argv[1:2] == ['test']
 
 ALLOWED_HOSTS = ['*']
 
@@ -46,10 +49,15 @@ INSTALLED_APPS = [
     "corsheaders",
     'users',
     'news',
+    'jobs',
 ]
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    'config.middleware.CompressionMiddleware',
+    'config.middleware.QueryInstrumentationMiddleware',
+    'config.middleware.ReplicaPinningMiddleware',
+    'config.middleware.ThrottleMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -96,6 +104,58 @@ DATABASES = {
         'PORT': config('DB_PORT'),
     }
 }
+# Read replicas of the primary, as "host" or "host:port"; news reads are spread across them.
+DATABASE_REPLICAS = []
+for index, replica in enumerate(config('DB_REPLICA_HOSTS', default='', cast=Csv())):
+    host, _, port = replica.partition(':')
+    DATABASES[f'replica_{index}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica_{index}')
+DATABASE_ROUTERS = ['config.routers.PrimaryReplicaRouter']
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', default=15, cast=int)
+
+# "default" may be local to each process; "shared" must be seen by every web and job worker process,
+# so it holds the keys other processes have to observe, such as cache versions. The file cache is
+# shared by the processes of one host; point it at Redis or Memcached when serving from several hosts.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default=''),
+    },
+    'shared': {
+        'BACKEND': config('SHARED_CACHE_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': config('SHARED_CACHE_LOCATION', default=os.path.join(tempfile.gettempdir(), 'news-shared-cache')),
+    },
+}
+if TESTING:
+    # Test runs get an in-process shared cache, so they start empty and leave nothing on disk.
+    CACHES['shared'] = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'shared'}
+NEWS_CACHE_TIMEOUT = config('NEWS_CACHE_TIMEOUT', default=300, cast=int)
+USER_AUTH_CACHE_TIMEOUT = config('USER_AUTH_CACHE_TIMEOUT', default=60, cast=int)
+THROTTLE_ENABLED = config('THROTTLE_ENABLED', default=True, cast=bool)
+THROTTLE_STORE = config('THROTTLE_STORE', default='config.throttling.CacheStore')
+# Cache alias of CacheStore's counters. It must be seen by every worker, or each one enforces the
+# limits on its own.
+THROTTLE_CACHE = config('THROTTLE_CACHE', default='shared')
+# Proxies, as addresses or networks, whose X-Forwarded-For header is trusted for the client address.
+THROTTLE_TRUSTED_PROXIES = config('THROTTLE_TRUSTED_PROXIES', default='', cast=Csv())
+THROTTLE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+THROTTLE_RULES = {
+    "login": {"ip": "10/min"},
+    "register": {"ip": "5/min"},
+    "token-refresh": {"ip": "30/min"},
+    "news-list-create": {"user": "30/hour"},
+    "news-detail": {"user": "60/min"},
+    "comment-list-create": {"user": "10/min", "ip": "60/min"},
+    "comment-bulk-create": {"user": "5/min"},
+    "saved-news": {"user": "60/min"},
+    "saved-news-bulk": {"user": "10/min"},
+    "author-follow": {"user": "30/min"},
+}
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -132,14 +192,30 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.IsAuthenticated",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        'rest_framework_jwt.authentication.JSONWebTokenAuthentication',
+        'users.authentication.CachedJSONWebTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
         'rest_framework.authentication.BasicAuthentication',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'config.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
     'DATETIME_FORMAT': "%d/%m/%Y %H:%M:%S",
     'DATE_FORMAT': "%d/%m/%Y"
 }
+PAGE_SIZE = config('PAGE_SIZE', default=20, cast=int)
+MAX_PAGE_SIZE = config('MAX_PAGE_SIZE', default=100, cast=int)
+BULK_MAX_ITEMS = config('BULK_MAX_ITEMS', default=500, cast=int)
+EXPORT_CHUNK_SIZE = config('EXPORT_CHUNK_SIZE', default=2000, cast=int)
+TRENDING_HALF_LIFE_HOURS = config('TRENDING_HALF_LIFE_HOURS', default=24, cast=float)
+TRENDING_WINDOW_DAYS = config('TRENDING_WINDOW_DAYS', default=7, cast=int)
+TIMELINE_MAX_ENTRIES = config('TIMELINE_MAX_ENTRIES', default=500, cast=int)
+TIMELINE_BACKFILL_ITEMS = config('TIMELINE_BACKFILL_ITEMS', default=50, cast=int)
+TIMELINE_FANOUT_BATCH_SIZE = config('TIMELINE_FANOUT_BATCH_SIZE', default=1000, cast=int)
+TIMELINE_PUSH_MAX_FOLLOWERS = config('TIMELINE_PUSH_MAX_FOLLOWERS', default=10000, cast=int)
+TIMELINE_PROLIFIC_DAILY_POSTS = config('TIMELINE_PROLIFIC_DAILY_POSTS', default=50, cast=int)
+NEWS_PURGE_BATCH_SIZE = config('NEWS_PURGE_BATCH_SIZE', default=2000, cast=int)
 # LOGGING = {
 #     'version': 1,
 #     'disable_existing_loggers': False,
@@ -160,11 +236,34 @@ REST_FRAMEWORK = {
 #         },
 #     },
 # }
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'config.sql': {
+            'handlers': ['console'],
+            'level': config('SQL_LOG_LEVEL', default='INFO'),
+            'propagate': False,
+        },
+    },
+}
+# Share of requests whose SQL is recorded and logged; opt in, e.g. 1.0 while profiling locally.
+SQL_SAMPLE_RATE = config('SQL_SAMPLE_RATE', default=0.0, cast=float)
+SQL_REPEAT_THRESHOLD = config('SQL_REPEAT_THRESHOLD', default=5, cast=int)
+COMPRESSION_MIN_SIZE = config('COMPRESSION_MIN_SIZE', default=1024, cast=int)
+COMPRESSION_GZIP_LEVEL = config('COMPRESSION_GZIP_LEVEL', default=6, cast=int)
+COMPRESSION_BROTLI_QUALITY = config('COMPRESSION_BROTLI_QUALITY', default=5, cast=int)
+COMPRESSION_CACHE_TIMEOUT = config('COMPRESSION_CACHE_TIMEOUT', default=NEWS_CACHE_TIMEOUT, cast=int)
 
 JWT_AUTH = {
     "JWT_ENCODE_HANDLER": "rest_framework_jwt.utils.jwt_encode_handler",
     "JWT_DECODE_HANDLER": "rest_framework_jwt.utils.jwt_decode_handler",
-    "JWT_PAYLOAD_HANDLER": "rest_framework_jwt.utils.jwt_payload_handler",
+    "JWT_PAYLOAD_HANDLER": "users.authentication.jwt_payload_handler",
     "JWT_PAYLOAD_GET_USER_ID_HANDLER": "rest_framework_jwt.utils.jwt_get_user_id_from_payload_handler",  # noqa
     "JWT_RESPONSE_PAYLOAD_HANDLER": "rest_framework_jwt.utils.jwt_response_payload_handler",  # noqa
     "JWT_SECRET_KEY": SECRET_KEY,
@@ -183,8 +282,27 @@ JWT_AUTH = {
     "JWT_AUTH_HEADER_PREFIX": "Bearer",
     "JWT_AUTH_COOKIE": None,
 }
+JOBS_WORKER_PROCESSES = config('JOBS_WORKER_PROCESSES', default=2, cast=int)
+JOBS_BATCH_SIZE = config('JOBS_BATCH_SIZE', default=10, cast=int)
+JOBS_POLL_INTERVAL = config('JOBS_POLL_INTERVAL', default=1.0, cast=float)
+JOBS_LOCK_TIMEOUT = config('JOBS_LOCK_TIMEOUT', default=600, cast=int)
+JOBS_MAX_ATTEMPTS = config('JOBS_MAX_ATTEMPTS', default=5, cast=int)
+JOBS_BACKOFF_BASE = config('JOBS_BACKOFF_BASE', default=10, cast=float)
+JOBS_BACKOFF_MAX = config('JOBS_BACKOFF_MAX', default=3600, cast=float)
+# Finished jobs older than this are deleted by prune_jobs; failed ones are kept for inspection.
+JOBS_RETENTION_HOURS = config('JOBS_RETENTION_HOURS', default=72, cast=int)
+EVENTS_BACKEND = config('EVENTS_BACKEND', default='config.events.LocalBackend')
+EVENTS_REDIS_URL = config('EVENTS_REDIS_URL', default='redis://localhost:6379/0')
+EVENTS_QUEUE_SIZE = config('EVENTS_QUEUE_SIZE', default=100, cast=int)
+EVENTS_HEARTBEAT_SECONDS = config('EVENTS_HEARTBEAT_SECONDS', default=15, cast=int)
+EVENTS_RETRY_MS = config('EVENTS_RETRY_MS', default=3000, cast=int)
+# Register/login only issue JWTs; set to False to also open a Django session (e.g. for the browsable API).
+AUTH_STATELESS = config('AUTH_STATELESS', default=True, cast=bool)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+NEWS_IMAGE_WIDTHS = (320, 640, 1280)
+NEWS_IMAGE_QUALITY = config('NEWS_IMAGE_QUALITY', default=80, cast=int)
+NEWS_IMAGE_WORKERS = config('NEWS_IMAGE_WORKERS', default=2, cast=int)
 STATIC_URL = 'static/'
 
 # Default primary key field type
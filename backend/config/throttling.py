@@ -0,0 +1,159 @@
+"""
+Sliding-window rate limiting with counters kept in a shared store.
+
+Each limit counts hits in fixed windows and weighs the previous window by how
+much of it still overlaps the sliding one, which needs two counters per client
+and only atomic increments from the store, so processes sharing a store see the
+same counts.
+"""
+import ipaddress
+import math
+import threading
+import time
+from collections import namedtuple
+from functools import lru_cache
+
+import jwt
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework_jwt.settings import api_settings
+
+Rate = namedtuple("Rate", ["limit", "window"])
+
+UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+jwt_decode_handler = api_settings.JWT_DECODE_HANDLER
+
+
+def parse_rate(rate):
+    """Parses ``"<count>/<unit>"`` where the unit is sec, min, hour or day (or their first letter)."""
+    count, unit = rate.split("/")
+    return Rate(int(count), UNITS[unit.strip()[0]])
+
+
+class CacheStore:
+    """
+    Counters in the ``THROTTLE_CACHE`` cache, "shared" by default so every worker process counts together.
+
+    The default file cache covers the processes of one host; point the alias at
+    Redis or Memcached, whose increments are atomic, when serving from several.
+    """
+
+    def __init__(self, cache_backend=None):
+        self.cache = cache_backend or caches[settings.THROTTLE_CACHE]
+
+    def incr(self, key, timeout):
+        if self.cache.add(key, 1, timeout=timeout):
+            return 1
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # Expired between add() and incr().
+            self.cache.set(key, 1, timeout=timeout)
+            return 1
+
+    def get(self, key):
+        return self.cache.get(key, 0)
+
+
+class MemoryStore:
+    """Per-process counters, for tests and single-process development servers."""
+
+    def __init__(self):
+        self.counters = {}
+        self.lock = threading.Lock()
+
+    def incr(self, key, timeout):
+        now = time.monotonic()
+        with self.lock:
+            value, expires = self.counters.get(key, (0, 0))
+            if expires <= now:
+                value, expires = 0, now + timeout
+            self.counters[key] = (value + 1, expires)
+            return value + 1
+
+    def get(self, key):
+        with self.lock:
+            value, expires = self.counters.get(key, (0, 0))
+            return value if expires > time.monotonic() else 0
+
+    def clear(self):
+        with self.lock:
+            self.counters.clear()
+
+
+class SlidingWindowLimiter:
+    def __init__(self, store):
+        self.store = store
+
+    def hit(self, key, rate, now=None):
+        """Counts a hit and returns 0 when it is allowed, or the seconds to wait before retrying."""
+        now = time.time() if now is None else now
+        window = int(now // rate.window)
+        elapsed = now - window * rate.window
+        current = self.store.incr(f"throttle:{key}:{window}", timeout=rate.window * 2)
+        if current > rate.limit:
+            return math.ceil(rate.window - elapsed)
+        previous = self.store.get(f"throttle:{key}:{window - 1}")
+        weight = 1 - elapsed / rate.window
+        if previous * weight + current <= rate.limit:
+            return 0
+        # Wait until enough of the previous window has slid out.
+        remaining = (rate.limit - current) / previous
+        return max(1, math.ceil((1 - remaining) * rate.window - elapsed))
+
+
+def get_store(path):
+    return import_string(path)()
+
+
+@lru_cache(maxsize=8)
+def get_trusted_networks(proxies):
+    return [ipaddress.ip_network(proxy, strict=False) for proxy in proxies]
+
+
+def is_trusted(address, networks):
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in networks)
+
+
+def get_client_ip(request):
+    """
+    The client address, taken from ``X-Forwarded-For`` when the peer is one of ``THROTTLE_TRUSTED_PROXIES``.
+
+    The header is read from the right and the first address that is not a trusted
+    proxy wins, since everything to its left was supplied by the client.
+    """
+    address = request.META.get("REMOTE_ADDR", "")
+    networks = get_trusted_networks(tuple(settings.THROTTLE_TRUSTED_PROXIES))
+    if not is_trusted(address, networks):
+        return address
+    hops = [hop.strip() for hop in request.META.get("HTTP_X_FORWARDED_FOR", "").split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not is_trusted(hop, networks):
+            return hop
+    return hops[0] if hops else address
+
+
+def get_user_id(request):
+    """The user id of a valid JWT in the request, without touching the database."""
+    header = request.META.get("HTTP_AUTHORIZATION", "").split()
+    if len(header) != 2 or header[0].lower() != api_settings.JWT_AUTH_HEADER_PREFIX.lower():
+        return None
+    try:
+        return jwt_decode_handler(header[1]).get("user_id")
+    except jwt.InvalidTokenError:
+        return None
+
+
+def get_identity(request, scope):
+    if scope == "endpoint":
+        return "all"
+    if scope == "user":
+        user_id = get_user_id(request)
+        if user_id:
+            return f"user:{user_id}"
+    return f"ip:{get_client_ip(request)}"
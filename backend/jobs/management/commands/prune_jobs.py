@@ -0,0 +1,22 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from jobs.manager import JobManager
+
+
+class Command(BaseCommand):
+    help = "Delete finished jobs older than JOBS_RETENTION_HOURS in short batches; run it from cron."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hours", type=int, default=settings.JOBS_RETENTION_HOURS)
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        older_than = timezone.now() - timedelta(hours=options["hours"])
+        deleted = 0
+        while pruned := JobManager.prune(older_than, options["batch_size"]):
+            deleted += pruned
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} finished jobs."))
@@ -0,0 +1,66 @@
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from jobs.manager import JobManager
+
+
+class Command(BaseCommand):
+    help = "Run queued jobs in one or more worker processes until stopped with SIGTERM or Ctrl+C."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=settings.JOBS_WORKER_PROCESSES)
+        parser.add_argument("--batch-size", type=int, default=settings.JOBS_BATCH_SIZE)
+        parser.add_argument("--poll-interval", type=float, default=settings.JOBS_POLL_INTERVAL)
+        parser.add_argument("--once", action="store_true", help="Run the jobs that are due, then exit.")
+
+    def handle(self, *args, **options):
+        if options["once"]:
+            count = JobManager.run_pending(self.get_worker_id(), options["batch_size"])
+            self.stdout.write(self.style.SUCCESS(f"Ran {count} jobs."))
+            return
+        if options["processes"] <= 1:
+            self.work(options["batch_size"], options["poll_interval"])
+            return
+
+        # Forked workers must not share the parent's database connections.
+        connections.close_all()
+        context = multiprocessing.get_context("fork")
+        workers = [context.Process(target=self.work, args=(options["batch_size"], options["poll_interval"]),
+                                   name=f"jobs-worker-{i}") for i in range(options["processes"])]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f"Started {len(workers)} job workers.")
+
+        def stop(signum, frame):
+            for worker in workers:
+                if worker.is_alive():
+                    os.kill(worker.pid, signal.SIGTERM)
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        for worker in workers:
+            worker.join()
+
+    def work(self, batch_size, poll_interval):
+        stopping = threading.Event()
+        signal.signal(signal.SIGTERM, lambda signum, frame: stopping.set())
+        signal.signal(signal.SIGINT, lambda signum, frame: stopping.set())
+        worker_id = self.get_worker_id()
+        while not stopping.is_set():
+            close_old_connections()
+            jobs = JobManager.claim(worker_id, batch_size)
+            for job in jobs:
+                JobManager.run(job)
+            if not jobs:
+                stopping.wait(poll_interval)
+        connections.close_all()
+
+    @staticmethod
+    def get_worker_id():
+        return f"{socket.gethostname()}:{os.getpid()}"
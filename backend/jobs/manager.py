@@ -0,0 +1,131 @@
+import logging
+import random
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.registry import get_handler
+
+logger = logging.getLogger(__name__)
+
+
+class JobManager:
+    """
+    A job queue kept in the database.
+
+    Jobs are inserted in the caller's transaction, so workers only see them once
+    the write that produced them has committed, and never see them if it rolls back.
+    Workers claim a batch with a single ``UPDATE ... WHERE id IN (SELECT ... FOR
+    UPDATE SKIP LOCKED)``, so they never wait on each other's rows. SQLite has no
+    row locks; there the UPDATE takes the database write lock and the same
+    statement still hands every job to one worker only.
+    """
+
+    @staticmethod
+    def enqueue(name, payload=None, run_at=None):
+        get_handler(name)
+        return Job.objects.create(name=name, payload=payload or {}, run_at=run_at or timezone.now())
+
+    @staticmethod
+    def get_claimable(now):
+        stale = now - timedelta(seconds=settings.JOBS_LOCK_TIMEOUT)
+        return (Q(status=Job.QUEUED, run_at__lte=now)
+                | Q(status=Job.RUNNING, locked_at__lt=stale, attempts__lt=F("max_attempts")))
+
+    @staticmethod
+    def fail_abandoned(now):
+        """
+        Fails the jobs whose worker died on their last attempt, and returns how many there were.
+
+        A job that kills its worker (out of memory, a crash, a timeout) never
+        reaches ``fail``, so its lock going stale is the only sign it failed.
+        """
+        stale = now - timedelta(seconds=settings.JOBS_LOCK_TIMEOUT)
+        failed = Job.objects.filter(status=Job.RUNNING, locked_at__lt=stale, attempts__gte=F("max_attempts")).update(
+            status=Job.FAILED, locked_by="", locked_at=None, finished_at=now,
+            last_error="The worker stopped while running the job.",
+        )
+        if failed:
+            logger.error("%d jobs failed after their worker stopped on the last attempt", failed)
+        return failed
+
+    @staticmethod
+    def claim(worker_id, limit):
+        now = timezone.now()
+        JobManager.fail_abandoned(now)
+        claimable = JobManager.get_claimable(now)
+        token = f"{worker_id}:{uuid.uuid4().hex[:8]}"
+        batch = (Job.objects.select_for_update(skip_locked=True).filter(claimable)
+                 .order_by("run_at", "id").values("id")[:limit])
+        with transaction.atomic():
+            claimed = Job.objects.filter(claimable, id__in=batch).update(
+                status=Job.RUNNING, locked_by=token, locked_at=now, attempts=F("attempts") + 1
+            )
+        if not claimed:
+            return []
+        return list(Job.objects.filter(status=Job.RUNNING, locked_by=token).order_by("run_at", "id"))
+
+    @staticmethod
+    def run(job):
+        try:
+            with transaction.atomic():
+                get_handler(job.name)(**job.payload)
+                JobManager.finish(job, Job.DONE, finished_at=timezone.now(), last_error="")
+        except Exception:
+            JobManager.fail(job, traceback.format_exc())
+            return False
+        return True
+
+    @staticmethod
+    def fail(job, error):
+        if job.attempts >= job.max_attempts:
+            logger.error("Job %s %s failed after %d attempts:\n%s", job.pk, job.name, job.attempts, error)
+            JobManager.finish(job, Job.FAILED, finished_at=timezone.now(), last_error=error)
+        else:
+            delay = JobManager.get_backoff(job.attempts)
+            logger.warning("Job %s %s failed (attempt %d), retrying in %.0fs", job.pk, job.name, job.attempts, delay)
+            JobManager.finish(job, Job.QUEUED, run_at=timezone.now() + timedelta(seconds=delay), last_error=error)
+
+    @staticmethod
+    def finish(job, status, **fields):
+        # Matching on locked_by leaves alone a job another worker reclaimed after our lock went stale.
+        Job.objects.filter(pk=job.pk, locked_by=job.locked_by).update(
+            status=status, locked_by="", locked_at=None, **fields
+        )
+
+    @staticmethod
+    def get_backoff(attempts):
+        """Exponential backoff with jitter, in seconds."""
+        delay = min(settings.JOBS_BACKOFF_MAX, settings.JOBS_BACKOFF_BASE * 2 ** (attempts - 1))
+        return delay * random.uniform(0.5, 1)
+
+    @staticmethod
+    def prune(older_than, batch_size=1000):
+        """
+        Deletes up to ``batch_size`` jobs that finished before ``older_than`` and returns how many went.
+
+        A job runs before it finishes, so bounding ``run_at`` as well lets the
+        (status, run_at) index find them.
+        """
+        batch = list(Job.objects.filter(status=Job.DONE, run_at__lt=older_than, finished_at__lt=older_than)
+                     .values_list("id", flat=True)[:batch_size])
+        if not batch:
+            return 0
+        return Job.objects.filter(id__in=batch).delete()[0]
+
+    @staticmethod
+    def run_pending(worker_id="inline", batch_size=None):
+        """Runs every job that is due, then returns how many ran; used by ``run_jobs --once`` and tests."""
+        batch_size = batch_size or settings.JOBS_BATCH_SIZE
+        count = 0
+        while jobs := JobManager.claim(worker_id, batch_size):
+            for job in jobs:
+                JobManager.run(job)
+            count += len(jobs)
+        return count
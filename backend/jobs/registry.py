@@ -0,0 +1,16 @@
+handlers = {}
+
+
+def job(name):
+    """Registers the decorated function as the handler of the jobs called ``name``."""
+    def decorator(func):
+        handlers[name] = func
+        return func
+    return decorator
+
+
+def get_handler(name):
+    try:
+        return handlers[name]
+    except KeyError:
+        raise LookupError(f"No handler registered for job '{name}'.")
@@ -0,0 +1,93 @@
+import io
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from jobs.manager import JobManager
+from jobs.models import Job
+from jobs.registry import job
+
+calls = []
+
+
+@job("tests.record")
+def record(value):
+    calls.append(value)
+
+
+@job("tests.fail")
+def fail():
+    raise RuntimeError("boom")
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_jobs_are_only_queued_with_the_committed_write(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            JobManager.enqueue("tests.record", {"value": 1})
+            raise RuntimeError
+        JobManager.enqueue("tests.record", {"value": 2})
+        call_command("run_jobs", once=True, stdout=io.StringIO())
+        self.assertEqual(calls, [2])
+        self.assertEqual(Job.objects.get().status, Job.DONE)
+        with self.assertRaises(LookupError):
+            JobManager.enqueue("tests.missing")
+
+    def test_claimed_jobs_are_not_handed_out_twice_until_their_lock_goes_stale(self):
+        first, second = (JobManager.enqueue("tests.record", {"value": i}) for i in range(2))
+        self.assertEqual([j.pk for j in JobManager.claim("a", 1)], [first.pk])
+        self.assertEqual([j.pk for j in JobManager.claim("b", 5)], [second.pk])
+        self.assertEqual(JobManager.claim("c", 5), [])
+        Job.objects.filter(pk=first.pk).update(locked_at=timezone.now() - timedelta(hours=1))
+        reclaimed = JobManager.claim("c", 5)
+        self.assertEqual([(j.pk, j.attempts) for j in reclaimed], [(first.pk, 2)])
+
+    @override_settings(JOBS_MAX_ATTEMPTS=2)
+    def test_jobs_that_keep_killing_their_worker_are_failed(self):
+        crashing = JobManager.enqueue("tests.record", {"value": 1})
+        for attempt in (1, 2):
+            self.assertEqual([(j.pk, j.attempts) for j in JobManager.claim("a", 5)], [(crashing.pk, attempt)])
+            Job.objects.filter(pk=crashing.pk).update(locked_at=timezone.now() - timedelta(hours=1))
+        with self.assertLogs("jobs.manager", "ERROR"):
+            self.assertEqual(JobManager.claim("b", 5), [])
+        crashing.refresh_from_db()
+        self.assertEqual((crashing.status, crashing.attempts, crashing.locked_by), (Job.FAILED, 2, ""))
+        self.assertEqual(calls, [])
+
+    @override_settings(JOBS_MAX_ATTEMPTS=3)
+    def test_failures_are_retried_with_backoff_then_given_up(self):
+        failing = JobManager.enqueue("tests.fail")
+        with self.assertLogs("jobs.manager", "WARNING"):
+            JobManager.run_pending()
+        failing.refresh_from_db()
+        self.assertEqual((failing.status, failing.attempts), (Job.QUEUED, 1))
+        self.assertIn("RuntimeError: boom", failing.last_error)
+        self.assertGreater(failing.run_at, timezone.now() + timedelta(seconds=4))
+
+        with override_settings(JOBS_BACKOFF_BASE=0):
+            Job.objects.filter(pk=failing.pk).update(run_at=timezone.now())
+            with self.assertLogs("jobs.manager", "WARNING") as logs:
+                JobManager.run_pending()
+        self.assertIn("failed after 3 attempts", logs.output[-1])
+        failing.refresh_from_db()
+        self.assertEqual((failing.status, failing.attempts), (Job.FAILED, 3))
+
+    @override_settings(JOBS_RETENTION_HOURS=24)
+    def test_finished_jobs_are_pruned_after_the_retention(self):
+        old, recent = (JobManager.enqueue("tests.record", {"value": i}) for i in range(2))
+        failing, queued = (JobManager.enqueue("tests.fail", run_at=timezone.now() + timedelta(hours=1))
+                           for _ in range(2))
+        JobManager.run_pending()
+        day_ago = timezone.now() - timedelta(hours=25)
+        Job.objects.filter(pk__in=[old.pk, failing.pk, queued.pk]).update(run_at=day_ago, finished_at=day_ago)
+        Job.objects.filter(pk=failing.pk).update(status=Job.FAILED)
+
+        out = io.StringIO()
+        call_command("prune_jobs", batch_size=1, stdout=out)
+        self.assertIn("Deleted 1 finished jobs.", out.getvalue())
+        self.assertEqual(set(Job.objects.values_list("pk", flat=True)), {recent.pk, failing.pk, queued.pk})
@@ -0,0 +1,102 @@
+from functools import wraps
+
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework import exceptions, status
+
+from config.renderers import ORJSONRenderer
+from news.manager.comment import CommentManager
+from news.manager.news import NewsManager
+from news.manager.saved_news import SavedNewsManager
+from news.models import News
+from news.pagination import NewsCursorPagination, CommentCursorPagination
+from news.readers import NewsReader, CommentReader
+from news.serializers import NewsSerializer, SavedNewsSerializer
+from users.authentication import AsyncJSONWebTokenAuthentication
+
+
+def json_response(data, status=status.HTTP_200_OK):
+    return HttpResponse(ORJSONRenderer().render(data), status=status, content_type="application/json")
+
+
+def jwt_required(view):
+    authentication = AsyncJSONWebTokenAuthentication()
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            result = await authentication.aauthenticate(request)
+        except exceptions.AuthenticationFailed as exc:
+            return json_response({"detail": exc.detail}, status=status.HTTP_401_UNAUTHORIZED)
+        if result is None:
+            return json_response({"detail": "Authentication credentials were not provided."},
+                                 status=status.HTTP_401_UNAUTHORIZED)
+        request.user = result[0]
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+def api_errors(view):
+    """Turns DRF exceptions, such as an invalid cursor, into responses the way APIView would."""
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            return await view(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            return json_response({"detail": exc.detail}, status=exc.status_code)
+    return wrapper
+
+
+async def paginate(paginator, queryset, request):
+    return paginator.paginate_rows([row async for row in paginator.get_page_queryset(queryset, request)])
+
+
+@require_GET
+@jwt_required
+@api_errors
+async def news_list(request):
+    try:
+        fields = NewsSerializer.select_fields(request.GET, NewsSerializer.compact_fields)
+    except ValueError as e:
+        return json_response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    paginator = NewsCursorPagination()
+    queryset = NewsReader.values(NewsManager.get_all_news(), fields, paginator.ordering_field, "pk")
+    rows = await paginate(paginator, queryset, request)
+    saved_ids = set()
+    if "is_saved" in fields:
+        saved_ids = await SavedNewsManager.aget_saved_ids(request.user, [row["id"] for row in rows])
+    results = NewsReader.render(rows, fields, {'request': request, 'saved_ids': saved_ids})
+    return json_response(paginator.get_paginated_response(results).data)
+
+
+@require_GET
+@jwt_required
+async def news_detail(request, news_id):
+    fields = NewsSerializer.select_fields({})
+    row = await NewsReader.values(News.objects.filter(id=news_id), fields).afirst()
+    if not row:
+        return json_response({"error": "News not found"}, status=status.HTTP_404_NOT_FOUND)
+    saved_ids = await SavedNewsManager.aget_saved_ids(request.user, [row["id"]])
+    return json_response(NewsReader.render([row], fields, {'saved_ids': saved_ids})[0])
+
+
+@require_GET
+@jwt_required
+@api_errors
+async def comment_list(request):
+    news_id = request.GET.get("news_id")
+    if not news_id:
+        return json_response({"error": "news_id is required"}, status=status.HTTP_400_BAD_REQUEST)
+    paginator = CommentCursorPagination()
+    queryset = CommentReader.values(CommentManager.get_by_news(news_id), CommentReader.fields,
+                                    paginator.ordering_field, "pk")
+    rows = await paginate(paginator, queryset, request)
+    return json_response(paginator.get_paginated_response(CommentReader.render(rows, CommentReader.fields)).data)
+
+
+@require_GET
+@jwt_required
+async def saved_news_list(request):
+    saved_news = [item async for item in SavedNewsManager.get_saved_news(user=request.user)]
+    return json_response(SavedNewsSerializer(saved_news, many=True).data)
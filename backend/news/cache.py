@@ -0,0 +1,55 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+
+from config.routers import RoutingState
+
+
+class NewsCache:
+    """
+    Versioned cache for public news payloads.
+
+    Every entry is stored under the current version, so a write only has to
+    bump the version for all older entries to become unreachable. The version
+    lives in the "shared" cache, so a bump made by one process, including the
+    job workers, reaches every other one; entries may stay process-local.
+    """
+    version_key = "news:version"
+
+    @staticmethod
+    def get_version():
+        shared = caches["shared"]
+        version = shared.get(NewsCache.version_key)
+        if version is None:
+            # Seed from the clock so an evicted version never falls back to an old one.
+            shared.add(NewsCache.version_key, int(time.time() * 1000), timeout=None)
+            version = shared.get(NewsCache.version_key)
+        return version
+
+    @staticmethod
+    def bump_version():
+        shared = caches["shared"]
+        try:
+            return shared.incr(NewsCache.version_key)
+        except ValueError:
+            version = int(time.time() * 1000)
+            shared.set(NewsCache.version_key, version, timeout=None)
+            return version
+
+    @staticmethod
+    def make_key(*parts):
+        digest = hashlib.md5(":".join(str(part) for part in parts).encode()).hexdigest()
+        return f"news:{parts[0]}:{digest}"
+
+    @staticmethod
+    def get_or_set(key, default):
+        version = NewsCache.get_version()
+        value = cache.get(key, version=version)
+        if value is None:
+            # A lagging replica could store pre-bump rows under the new version for the whole timeout.
+            with RoutingState(pinned=True).active():
+                value = default()
+            cache.set(key, value, timeout=settings.NEWS_CACHE_TIMEOUT, version=version)
+        return value
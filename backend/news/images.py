@@ -0,0 +1,42 @@
+"""
+Pure Pillow helpers for building responsive variants of news images.
+
+Nothing here touches Django so the functions can run inside worker processes.
+"""
+import base64
+import hashlib
+import io
+
+from PIL import Image, ImageOps
+
+FORMATS = {"webp": "WEBP", "jpeg": "JPEG"}
+PLACEHOLDER_WIDTH = 16
+
+
+def content_hash(source):
+    return hashlib.sha256(source).hexdigest()
+
+
+def encode(image, image_format, quality):
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format, quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+def resize(image, width):
+    height = max(1, round(image.height * width / image.width))
+    return image.resize((width, height), Image.LANCZOS)
+
+
+def render_variants(source, widths, quality=80):
+    image = ImageOps.exif_transpose(Image.open(io.BytesIO(source))).convert("RGB")
+    widths = sorted({width for width in widths if width < image.width} | {min(image.width, max(widths))})
+    variants = {}
+    for width in widths:
+        resized = image if width == image.width else resize(image, width)
+        variants[width] = {ext: encode(resized, image_format, quality) for ext, image_format in FORMATS.items()}
+    placeholder = encode(resize(image, min(PLACEHOLDER_WIDTH, image.width)), "WEBP", 30)
+    return {
+        "variants": variants,
+        "placeholder": "data:image/webp;base64," + base64.b64encode(placeholder).decode("ascii"),
+    }
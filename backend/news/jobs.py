@@ -0,0 +1,42 @@
+from django.utils.dateparse import parse_datetime
+
+from jobs.manager import JobManager
+from jobs.registry import job
+from news.manager.image import NewsImageManager
+from news.manager.news import NewsManager
+from news.manager.saved_news import SavedNewsManager
+from news.manager.timeline import TimelineManager
+from news.manager.trending import TrendingManager
+from news.models import TimelineEntry
+
+
+@job("news.build_image_variants")
+def build_image_variants(news_id, image_name):
+    NewsImageManager.build(news_id, image_name)
+
+
+@job("news.timeline_fan_out")
+def timeline_fan_out(news_id):
+    TimelineManager.fan_out(news_id)
+
+
+@job("news.timeline_retract")
+def timeline_retract(news_id):
+    TimelineEntry.objects.filter(news_id=news_id).delete()
+
+
+@job("news.record_trending")
+def record_trending(weights, moment):
+    TrendingManager.record(dict(weights), parse_datetime(moment))
+
+
+@job("news.refresh_save_counts")
+def refresh_save_counts(news_ids):
+    SavedNewsManager.refresh_save_counts(news_ids)
+
+
+@job("news.purge")
+def purge(news_id):
+    # One batch per job, so every transaction stays short; the next batch is queued with this one's commit.
+    if not NewsManager.purge(news_id):
+        JobManager.enqueue("news.purge", {"news_id": news_id})
@@ -0,0 +1,60 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from news.images import content_hash, render_variants
+from news.manager.image import NewsImageManager
+from news.models import News
+
+
+class Command(BaseCommand):
+    help = "Build responsive image variants for news that have an image but no variants yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument("--workers", type=int, default=settings.NEWS_IMAGE_WORKERS)
+
+    def handle(self, *args, **options):
+        pending = (News.objects.exclude(image="").exclude(image__isnull=True)
+                   .filter(image_variants={}).values_list("id", "image").order_by("id"))
+        done = 0
+        with ProcessPoolExecutor(max_workers=options["workers"]) as executor:
+            batch = []
+            for row in pending.iterator(chunk_size=options["batch_size"]):
+                batch.append(row)
+                if len(batch) >= options["batch_size"]:
+                    done += self.process(executor, batch)
+            done += self.process(executor, batch)
+        self.stdout.write(self.style.SUCCESS(f"Built image variants for {done} news."))
+
+    def process(self, executor, batch):
+        jobs = {}
+        for news_id, image_name in batch:
+            try:
+                with default_storage.open(image_name, "rb") as image_file:
+                    source = image_file.read()
+            except OSError as e:
+                self.stderr.write(f"Skipping news {news_id}: {e}")
+                continue
+            digest = content_hash(source)
+            if digest in jobs or not NewsImageManager.reuse(news_id, digest):
+                jobs.setdefault(digest, (source, []))[1].append(news_id)
+
+        futures = {
+            digest: executor.submit(render_variants, source, settings.NEWS_IMAGE_WIDTHS, settings.NEWS_IMAGE_QUALITY)
+            for digest, (source, _) in jobs.items()
+        }
+        for digest, future in futures.items():
+            try:
+                variants = NewsImageManager.store(jobs[digest][1][0], digest, future.result())
+            except Exception as e:
+                self.stderr.write(f"Failed to build variants for {jobs[digest][1]}: {e}")
+                continue
+            for news_id in jobs[digest][1][1:]:
+                NewsImageManager.save_variants(news_id, variants)
+
+        count = len(batch)
+        batch.clear()
+        return count
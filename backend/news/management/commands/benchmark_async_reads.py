@@ -0,0 +1,75 @@
+import asyncio
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, override_settings
+
+from config.benchmarking import isolated_caches
+from news.models import News
+from users.managers import AuthManager
+from users.models import Users
+
+
+class Command(BaseCommand):
+    help = "Compare sync and async read endpoints under concurrent load through the ASGI handler."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--username", help="User to authenticate as (defaults to the first active user).")
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--concurrency", type=int, default=50)
+        parser.add_argument("--no-cache", action="store_true",
+                            help="Disable the news cache so both paths hit the database.")
+
+    def handle(self, *args, **options):
+        # Each run clears the cache, so it must never be the one the site is serving from.
+        if options["no_cache"]:
+            dummy = {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+            with override_settings(CACHES={"default": dummy, "shared": dummy}):
+                return self.compare(**options)
+        with isolated_caches():
+            return self.compare(**options)
+
+    def compare(self, **options):
+        user = self.get_user(options["username"])
+        news = News.objects.filter(is_published=True).first()
+        if news is None:
+            raise CommandError("No published news to read; run seed_benchmark_data first.")
+        headers = {"Authorization": f"Bearer {AuthManager.generate_token(user)}"}
+        pairs = [
+            ("news list", "/news/", "/async/news/"),
+            ("news detail", f"/news/{news.id}/", f"/async/news/{news.id}/"),
+            ("comments", f"/comments/?news_id={news.id}", f"/async/comments/?news_id={news.id}"),
+            ("saved news", "/saved-news/", "/async/saved-news/"),
+        ]
+        for name, sync_path, async_path in pairs:
+            sync_rate = asyncio.run(self.run(sync_path, headers, options["requests"], options["concurrency"]))
+            async_rate = asyncio.run(self.run(async_path, headers, options["requests"], options["concurrency"]))
+            self.stdout.write(
+                f"{name:<12} sync {sync_rate:8.1f} req/s   async {async_rate:8.1f} req/s   "
+                f"x{async_rate / sync_rate:.2f}"
+            )
+
+    @staticmethod
+    def get_user(username):
+        users = Users.objects.filter(is_active=True)
+        user = users.filter(username=username).first() if username else users.first()
+        if user is None:
+            raise CommandError("No active user found.")
+        return user
+
+    @staticmethod
+    async def run(path, headers, total, concurrency):
+        cache.clear()
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch():
+            async with semaphore:
+                response = await client.get(path, headers=headers)
+                if response.status_code != 200:
+                    raise CommandError(f"{path} returned {response.status_code}")
+
+        started = time.perf_counter()
+        await asyncio.gather(*(fetch() for _ in range(total)))
+        return total / (time.perf_counter() - started)
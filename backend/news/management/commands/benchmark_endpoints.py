@@ -0,0 +1,263 @@
+import json
+import statistics
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern
+
+from config.benchmarking import isolated_caches
+from news import urls as news_urls
+from news.manager.comment import CommentManager
+from news.manager.news import NewsManager
+from news.manager.timeline import TimelineManager
+from news.models import News
+from users import urls as users_urls
+from users.managers import AuthManager
+from users.models import Follow, Users
+
+
+class Scenarios:
+    """Builds the requests to benchmark for each named URL in news/urls.py and users/urls.py."""
+
+    bulk_size = 10
+
+    def __init__(self, user, password, iterations):
+        self.user = user
+        self.password = password
+        self.iterations = iterations
+        self.news = NewsManager.get_all_news().exclude(author=user).first()
+        if self.news is None:
+            raise CommandError("No published news by other users; run seed_benchmark_data first.")
+        self.word = self.news.title.split()[0]
+
+    def build(self, name):
+        builder = getattr(self, name.replace("-", "_"), None)
+        return builder() if builder else None
+
+    def register(self):
+        return [("POST", "/register/", lambda i: {"username": f"bm{uuid.uuid4().hex[:16]}",
+                                                  "password": self.password})]
+
+    def login(self):
+        return [("POST", "/login/", lambda i: {"username": self.user.username, "password": self.password})]
+
+    def token_refresh(self):
+        token = AuthManager.generate_token(self.user)
+        return [("POST", "/token/refresh/", lambda i: {"token": token})]
+
+    def token_verify(self):
+        token = AuthManager.generate_token(self.user)
+        return [("POST", "/token/verify/", lambda i: {"token": token})]
+
+    def news_list_create(self):
+        return [
+            ("GET", "/news/", None),
+            ("POST", "/news/", lambda i: {"title": f"Benchmark {uuid.uuid4().hex}", "content": "Benchmark content",
+                                          "author_id": str(self.user.id)}),
+        ]
+
+    def my_news(self):
+        return [("GET", "/my-news/", None)]
+
+    def news_search(self):
+        return [("GET", f"/news/search/?q={self.word}", None)]
+
+    def news_trending(self):
+        return [("GET", "/news/trending/", None)]
+
+    def timeline(self):
+        authors = News.objects.exclude(author=self.user).values_list("author_id", flat=True).distinct()[:50]
+        for author_id in authors:
+            TimelineManager.follow(self.user, author_id)
+        return [("GET", "/timeline/", None)]
+
+    def author_follow(self):
+        followed = Follow.objects.filter(follower=self.user).values("author_id")
+        authors = list(Users.objects.exclude(id=self.user.id).exclude(id__in=followed)
+                       .values_list("id", flat=True)[:self.iterations])
+        if len(authors) < self.iterations:
+            raise CommandError("Not enough users to benchmark following; seed more data.")
+        return [
+            ("POST", lambda i: f"/authors/{authors[i]}/follow/", None),
+            ("DELETE", lambda i: f"/authors/{authors[i]}/follow/", None),
+        ]
+
+    def news_detail(self):
+        own = [NewsManager.create(f"Benchmark {uuid.uuid4().hex}", self.user, "Benchmark content")
+               for _ in range(self.iterations)]
+        return [
+            ("GET", f"/news/{self.news.id}/", None),
+            ("PUT", lambda i: f"/news/{own[i].id}/", lambda i: {"title": f"Updated {i}"}),
+            ("DELETE", lambda i: f"/news/{own[i].id}/", None),
+        ]
+
+    def comment_list_create(self):
+        comments = [CommentManager.create(self.news, self.user, f"Comment {i}") for i in range(self.iterations)]
+        return [
+            ("GET", f"/comments/?news_id={self.news.id}", None),
+            ("POST", "/comments/", lambda i: {"news": self.news.id, "user_id": str(self.user.id),
+                                              "content": f"Comment {i}"}),
+            ("DELETE", "/comments/", lambda i: {"comment_id": comments[i].id}),
+        ]
+
+    def comment_bulk_create(self):
+        return [("POST", "/comments/bulk/", lambda i: {"comments": [
+            {"news_id": self.news.id, "content": f"Bulk comment {i}.{n}"} for n in range(self.bulk_size)
+        ]})]
+
+    def saved_news(self):
+        news_ids = list(News.objects.exclude(saved_by__user=self.user)
+                        .values_list("id", flat=True)[:self.iterations])
+        if len(news_ids) < self.iterations:
+            raise CommandError("Not enough news to benchmark saving; seed more data.")
+        return [
+            ("GET", "/saved-news/", None),
+            ("POST", "/saved-news/", lambda i: {"news_id": news_ids[i]}),
+            ("DELETE", "/saved-news/", lambda i: {"news_id": news_ids[i]}),
+        ]
+
+    def saved_news_bulk(self):
+        news_ids = list(News.objects.exclude(saved_by__user=self.user)
+                        .values_list("id", flat=True)[:self.iterations * self.bulk_size])
+        if len(news_ids) < self.iterations * self.bulk_size:
+            raise CommandError("Not enough news to benchmark bulk saving; seed more data.")
+
+        def batch(i):
+            return {"news_ids": news_ids[i * self.bulk_size:(i + 1) * self.bulk_size]}
+
+        return [
+            ("POST", "/saved-news/bulk/", batch),
+            ("DELETE", "/saved-news/bulk/", batch),
+        ]
+
+    def news_export(self):
+        return [("GET", f"/export/news/?author={self.news.author.username}", None)]
+
+    def comment_export(self):
+        return [("GET", f"/export/comments/?news_id={self.news.id}", None)]
+
+    def saved_news_export(self):
+        return [("GET", "/export/saved-news/", None)]
+
+    def async_news_list(self):
+        return [("GET", "/async/news/", None)]
+
+    def async_news_detail(self):
+        return [("GET", f"/async/news/{self.news.id}/", None)]
+
+    def async_comment_list(self):
+        return [("GET", f"/async/comments/?news_id={self.news.id}", None)]
+
+    def async_saved_news(self):
+        return [("GET", "/async/saved-news/", None)]
+
+
+class Command(BaseCommand):
+    help = "Benchmark every news and users endpoint and write latency, query and size stats as JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--username", default="bench_0")
+        parser.add_argument("--password", default="benchmark123")
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=3)
+        parser.add_argument("--output", default=None)
+        parser.add_argument("--baseline", default=None, help="Previous results file to compare against.")
+
+    def handle(self, *args, **options):
+        # The scenarios clear the cache, so they get private ones rather than the site's.
+        with isolated_caches():
+            self.benchmark(**options)
+
+    def benchmark(self, **options):
+        user = Users.objects.filter(username=options["username"]).first()
+        if user is None or not user.check_password(options["password"]):
+            raise CommandError("Benchmark user not found or wrong password; run seed_benchmark_data first.")
+        cache.clear()
+        iterations = options["iterations"]
+        warmup = options["warmup"]
+        scenarios = Scenarios(user, options["password"], iterations + warmup)
+        client = Client(HTTP_AUTHORIZATION=f"Bearer {AuthManager.generate_token(user)}")
+
+        results = {}
+        for pattern in news_urls.urlpatterns + users_urls.urlpatterns:
+            if not isinstance(pattern, URLPattern):
+                continue
+            requests = scenarios.build(pattern.name)
+            if requests is None:
+                self.stderr.write(f"No benchmark scenario for '{pattern.name}', skipping.")
+                continue
+            for method, path, data in requests:
+                key = f"{method} {pattern.name}"
+                with override_settings(THROTTLE_ENABLED=False):
+                    results[key] = self.measure(client, method, path, data, iterations, warmup)
+                self.stdout.write(self.format_row(key, results[key]))
+
+        report = {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "iterations": iterations,
+            "database": connection.vendor,
+            "results": results,
+        }
+        output = options["output"] or f"benchmark-{datetime.now():%Y%m%d-%H%M%S}.json"
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Results written to {output}"))
+        if options["baseline"]:
+            self.compare(options["baseline"], results)
+
+    @staticmethod
+    def measure(client, method, path, data, iterations, warmup):
+        timings, queries, sizes, statuses = [], [], [], Counter()
+        for i in range(warmup + iterations):
+            request_path = path(i) if callable(path) else path
+            payload = data(i) if callable(data) else data
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = client.generic(method, request_path, json.dumps(payload) if payload else "",
+                                          content_type="application/json")
+                body = b"".join(response.streaming_content) if response.streaming else response.content
+                elapsed = (time.perf_counter() - started) * 1000
+            if i < warmup:
+                continue
+            timings.append(elapsed)
+            queries.append(len(captured))
+            sizes.append(len(body))
+            statuses[response.status_code] += 1
+        quantiles = statistics.quantiles(timings, n=100) if len(timings) > 1 else timings * 99
+        return {
+            "p50_ms": round(statistics.median(timings), 3),
+            "p90_ms": round(quantiles[89], 3),
+            "p99_ms": round(quantiles[98], 3),
+            "mean_ms": round(statistics.fmean(timings), 3),
+            "queries": round(statistics.fmean(queries), 2),
+            "max_queries": max(queries),
+            "response_bytes": round(statistics.fmean(sizes)),
+            "statuses": {str(code): count for code, count in statuses.items()},
+        }
+
+    @staticmethod
+    def format_row(key, stats):
+        return (f"{key:<32} p50 {stats['p50_ms']:8.2f}ms  p90 {stats['p90_ms']:8.2f}ms  "
+                f"p99 {stats['p99_ms']:8.2f}ms  queries {stats['queries']:6.1f}  "
+                f"bytes {stats['response_bytes']:8d}  {stats['statuses']}")
+
+    def compare(self, baseline_path, results):
+        with open(baseline_path) as f:
+            baseline = json.load(f)["results"]
+        self.stdout.write(f"\nCompared with {baseline_path}:")
+        for key, stats in results.items():
+            before = baseline.get(key)
+            if before is None:
+                continue
+            change = (stats["p50_ms"] - before["p50_ms"]) / before["p50_ms"] * 100 if before["p50_ms"] else 0
+            line = (f"{key:<32} p50 {before['p50_ms']:8.2f} -> {stats['p50_ms']:8.2f}ms ({change:+.1f}%)  "
+                    f"queries {before['queries']} -> {stats['queries']}")
+            regressed = change > 10 or stats["queries"] > before["queries"]
+            self.stdout.write(self.style.WARNING(line) if regressed else line)
@@ -0,0 +1,63 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from config.renderers import ORJSONRenderer
+from news.models import Comment, News
+from news.readers import CommentReader, NewsReader
+from news.serializers import CommentSerializer, NewsSerializer
+
+
+class Command(BaseCommand):
+    help = "Compare the per-item cost of the ModelSerializer + JSONRenderer path with the values() + orjson path."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--items", type=int, default=100)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        items, repeat = options["items"], options["repeat"]
+        request = APIRequestFactory().get("/news/")
+        news = News.objects.select_related("author").order_by("-published_at")[:items]
+        comments = Comment.objects.select_related("user").order_by("-created_at")[:items]
+        if len(news) < items or len(comments) < items:
+            raise CommandError(f"Need at least {items} news and comments; run seed_benchmark_data first.")
+        saved_ids = set()
+
+        cases = []
+        for label, fields in (("news (full)", NewsSerializer.select_fields({})),
+                              ("news (compact)", NewsSerializer.compact_fields)):
+            context = {"request": request, "saved_ids": saved_ids}
+            cases.append((
+                label,
+                lambda fields=fields, context=context: JSONRenderer().render(
+                    NewsSerializer(news.all(), many=True, fields=fields, context=context).data),
+                lambda fields=fields, context=context: ORJSONRenderer().render(
+                    NewsReader.render(NewsReader.values(news.all(), fields), fields, context)),
+            ))
+        cases.append((
+            "comments",
+            lambda: JSONRenderer().render(CommentSerializer(comments.all(), many=True).data),
+            lambda: ORJSONRenderer().render(
+                CommentReader.render(CommentReader.values(comments.all(), CommentReader.fields), CommentReader.fields)),
+        ))
+
+        for label, serializer_path, fast_path in cases:
+            if serializer_path() != fast_path():
+                raise CommandError(f"{label}: fast path output differs from the serializer output.")
+            before = self.per_item_us(serializer_path, items, repeat)
+            after = self.per_item_us(fast_path, items, repeat)
+            self.stdout.write(f"{label:<16} serializer {before:8.1f}us/item  fast {after:8.1f}us/item  "
+                              f"speedup {before / after:5.2f}x")
+
+    @staticmethod
+    def per_item_us(render, items, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            render()
+            timings.append(time.perf_counter() - started)
+        return statistics.median(timings) / items * 1e6
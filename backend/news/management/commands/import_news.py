@@ -0,0 +1,179 @@
+import csv
+import json
+import re
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models.functions import Length
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.text import slugify
+
+from news.cache import NewsCache
+from news.models import News
+from users.models import Users
+
+SLUG_MAX_LENGTH = News._meta.get_field("slug").max_length
+TRUE_VALUES = {"1", "true", "yes", "y", "t"}
+
+
+class Command(BaseCommand):
+    help = "Stream news from a JSONL or CSV archive into the database in batches, deduplicating slugs."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Input file, or '-' for stdin.")
+        parser.add_argument("--format", choices=["jsonl", "csv"], default=None,
+                            help="Defaults to the file extension.")
+        parser.add_argument("--author", default=None, help="Username used for rows without an author.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        input_format = options["format"] or ("csv" if path.endswith(".csv") else "jsonl")
+        self.default_author = options["author"]
+        self.imported = self.skipped = 0
+        self.started = time.perf_counter()
+
+        try:
+            stream = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+        except OSError as e:
+            raise CommandError(f"Cannot open {path}: {e}")
+        try:
+            batch = []
+            for line_number, row in self.read_rows(stream, input_format):
+                batch.append((line_number, row))
+                if len(batch) >= options["batch_size"]:
+                    self.flush(batch)
+            self.flush(batch)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        NewsCache.bump_version()
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {self.imported} news, skipped {self.skipped} rows in {self.elapsed():.1f}s."
+        ))
+
+    def read_rows(self, stream, input_format):
+        if input_format == "csv":
+            csv.field_size_limit(sys.maxsize)
+            for line_number, row in enumerate(csv.DictReader(stream), start=2):
+                yield line_number, row
+            return
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except json.JSONDecodeError as e:
+                self.skip(line_number, f"invalid JSON ({e})")
+
+    def flush(self, batch):
+        if not batch:
+            return
+        usernames = {row.get("author") or self.default_author for _, row in batch} - {None, ""}
+        authors = dict(Users.objects.filter(username__in=usernames).values_list("username", "id"))
+
+        news = []
+        for line_number, row in batch:
+            item = self.build(line_number, row, authors)
+            if item is not None:
+                news.append(item)
+        self.assign_slugs(news)
+
+        # bulk_create stamps auto_now/auto_now_add fields, so the archive's timestamps are written back after it.
+        timestamps = [(item.published_at, item.updated_at) for item in news]
+        with transaction.atomic():
+            created = News.objects.bulk_create(news)
+            for item, (published_at, updated_at) in zip(created, timestamps):
+                item.published_at, item.updated_at = published_at, updated_at
+            News.objects.bulk_update(created, ["published_at", "updated_at"])
+            News.update_search_vector(News.objects.filter(slug__in=[item.slug for item in created]))
+
+        self.imported += len(created)
+        batch.clear()
+        elapsed = self.elapsed()
+        self.stdout.write(f"Imported {self.imported} news ({self.imported / elapsed:.0f} rows/s), "
+                          f"skipped {self.skipped}.")
+
+    def build(self, line_number, row, authors):
+        title = (row.get("title") or "").strip()
+        content = row.get("content") or ""
+        if not title or not content.strip():
+            self.skip(line_number, "title and content are required")
+            return None
+        author_id = authors.get(row.get("author") or self.default_author)
+        if author_id is None:
+            self.skip(line_number, f"unknown author {row.get('author') or self.default_author!r}")
+            return None
+        published_at = self.parse_datetime(row.get("published_at")) or timezone.now()
+        excerpt, reading_time = News.summarize(content)
+        return News(
+            title=title[:255],
+            slug=slugify(row.get("slug") or title)[:SLUG_MAX_LENGTH] or "news",
+            author_id=author_id,
+            content=content,
+            excerpt=excerpt,
+            reading_time=reading_time,
+            is_published=str(row.get("is_published", "")).strip().lower() in TRUE_VALUES,
+            published_at=published_at,
+            updated_at=self.parse_datetime(row.get("updated_at")) or published_at,
+        )
+
+    @staticmethod
+    def parse_datetime(value):
+        parsed = parse_datetime(value) if value else None
+        if parsed is None:
+            return None
+        return timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
+
+    def assign_slugs(self, news):
+        """
+        Makes every slug in the batch unique against the database and the rest of the batch.
+
+        One exact lookup finds the base slugs already taken; each base that clashes
+        then reads its highest numeric suffix with a query returning one row, and
+        its items count up from there. A last exact lookup catches generated slugs
+        that equal another item's slug, which is rare.
+        """
+        taken = set(News.all_objects.filter(slug__in={item.slug for item in news}).values_list("slug", flat=True))
+        accepted = set()
+        pending = []
+        for item in news:
+            if item.slug in taken or item.slug in accepted:
+                pending.append((item, item.slug))
+            else:
+                accepted.add(item.slug)
+        next_number = {base: self.get_max_suffix(base) + 1 for base in {base for _, base in pending}}
+        while pending:
+            for item, base in pending:
+                item.slug, next_number[base] = self.next_slug(base, next_number[base], accepted)
+                accepted.add(item.slug)
+            clashing = set(News.all_objects.filter(slug__in=[item.slug for item, _ in pending])
+                           .values_list("slug", flat=True))
+            pending = [(item, base) for item, base in pending if item.slug in clashing]
+
+    @staticmethod
+    def get_max_suffix(base):
+        """The highest N among the existing ``<base>-N`` slugs, or 1 when there are none."""
+        latest = (News.all_objects.filter(slug__startswith=f"{base}-", slug__regex=rf"^{re.escape(base)}-[0-9]+$")
+                  .order_by(Length("slug").desc(), "-slug").values_list("slug", flat=True).first())
+        return int(latest.rsplit("-", 1)[1]) if latest else 1
+
+    @staticmethod
+    def next_slug(base, number, accepted):
+        while True:
+            suffix = f"-{number}"
+            slug = base[:SLUG_MAX_LENGTH - len(suffix)] + suffix
+            number += 1
+            if slug not in accepted:
+                return slug, number
+
+    def skip(self, line_number, reason):
+        self.skipped += 1
+        self.stderr.write(f"Line {line_number}: skipped, {reason}.")
+
+    def elapsed(self):
+        return max(time.perf_counter() - self.started, 1e-9)
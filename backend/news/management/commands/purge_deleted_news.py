@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from news.manager.news import NewsManager
+from news.models import News
+
+
+class Command(BaseCommand):
+    help = "Purge every deleted news item that is still waiting for its purge job, one batch per transaction."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=settings.NEWS_PURGE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        news_ids = list(News.all_objects.filter(deleted_at__isnull=False).values_list("id", flat=True))
+        for news_id in news_ids:
+            done = False
+            while not done:
+                with transaction.atomic():
+                    done = NewsManager.purge(news_id, options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Purged {len(news_ids)} news."))
@@ -0,0 +1,46 @@
+import math
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from news.manager.trending import TrendingManager
+from news.models import Comment, SavedNews, TrendingScore
+
+
+class Command(BaseCommand):
+    help = "Recompute the trending scores from the comments and saves of the last TRENDING_WINDOW_DAYS days."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=settings.TRENDING_WINDOW_DAYS)
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        since = now - timedelta(days=options["days"])
+        batch_size = options["batch_size"]
+        reference = TrendingManager.get_exponent(now)
+
+        # Sums are kept relative to now so 2 ** exponent stays within float range.
+        totals = defaultdict(float)
+        events = (
+            (Comment.objects.filter(created_at__gte=since).values_list("news_id", "created_at"),
+             TrendingManager.COMMENT_WEIGHT),
+            (SavedNews.objects.filter(saved_at__gte=since).values_list("news_id", "saved_at"),
+             TrendingManager.SAVE_WEIGHT),
+        )
+        for queryset, weight in events:
+            for news_id, moment in queryset.order_by().iterator(chunk_size=batch_size):
+                totals[news_id] += weight * 2 ** (TrendingManager.get_exponent(moment) - reference)
+
+        with transaction.atomic():
+            TrendingScore.objects.all().delete()
+            TrendingScore.objects.bulk_create(
+                (TrendingScore(news_id=news_id, score=math.log2(total) + reference)
+                 for news_id, total in totals.items()),
+                batch_size=batch_size,
+            )
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt trending scores for {len(totals)} news."))
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from news.models import Comment, News, SavedNews
+
+
+class Command(BaseCommand):
+    help = "Recompute News.comment_count and News.save_count for rows that drifted from the real counts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        comments = (Comment.objects.filter(news=OuterRef("pk")).order_by()
+                    .values("news").annotate(total=Count("pk")).values("total"))
+        saves = (SavedNews.objects.filter(news=OuterRef("pk")).order_by()
+                 .values("news").annotate(total=Count("pk")).values("total"))
+        drifted = (
+            News.objects.annotate(
+                actual_comments=Coalesce(Subquery(comments), 0),
+                actual_saves=Coalesce(Subquery(saves), 0),
+            )
+            .exclude(comment_count=F("actual_comments"), save_count=F("actual_saves"))
+            .only("id", "comment_count", "save_count")
+            .order_by()
+        )
+
+        batch, fixed = [], 0
+        for news in drifted.iterator(chunk_size=batch_size):
+            news.comment_count = news.actual_comments
+            news.save_count = news.actual_saves
+            batch.append(news)
+            if len(batch) >= batch_size:
+                fixed += self.flush(batch)
+        fixed += self.flush(batch)
+        self.stdout.write(self.style.SUCCESS(f"Fixed counters on {fixed} news."))
+
+    @staticmethod
+    def flush(batch):
+        News.objects.bulk_update(batch, ["comment_count", "save_count"])
+        count = len(batch)
+        batch.clear()
+        return count
@@ -0,0 +1,83 @@
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from news.models import Comment, News, SavedNews
+from users.models import Users
+
+WORDS = ("economy politics sport science health travel music cinema market energy climate election "
+         "technology football education transport culture weather research finance startup").split()
+
+
+class Command(BaseCommand):
+    help = "Bulk-generate users, news, comments and saved news for benchmarking."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--news", type=int, default=1000)
+        parser.add_argument("--comments", type=int, default=10000)
+        parser.add_argument("--saved", type=int, default=5000)
+        parser.add_argument("--password", default="benchmark123")
+        parser.add_argument("--prefix", default="bench")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        batch_size = options["batch_size"]
+        prefix = options["prefix"]
+        password = make_password(options["password"])
+
+        with transaction.atomic():
+            start = Users.objects.filter(username__startswith=f"{prefix}_").count()
+            Users.objects.bulk_create(
+                (Users(username=f"{prefix}_{start + i}", email=f"{prefix}_{start + i}@example.com", password=password)
+                 for i in range(options["users"])),
+                batch_size=batch_size,
+            )
+            user_ids = list(Users.objects.filter(username__startswith=f"{prefix}_").values_list("id", flat=True))
+            self.stdout.write(f"Users: {len(user_ids)}")
+
+            start = News.objects.filter(slug__startswith=f"{prefix}-").count()
+            News.objects.bulk_create(
+                (self.make_news(rng, prefix, start + i, rng.choice(user_ids)) for i in range(options["news"])),
+                batch_size=batch_size,
+            )
+            news_ids = list(News.objects.filter(slug__startswith=f"{prefix}-").values_list("id", flat=True))
+            News.update_search_vector(News.objects.filter(id__in=news_ids))
+            self.stdout.write(f"News: {len(news_ids)}")
+
+            Comment.objects.bulk_create(
+                (Comment(news_id=rng.choice(news_ids), user_id=rng.choice(user_ids), content=self.sentence(rng, 20))
+                 for _ in range(options["comments"])),
+                batch_size=batch_size,
+            )
+            SavedNews.objects.bulk_create(
+                (SavedNews(news_id=rng.choice(news_ids), user_id=rng.choice(user_ids))
+                 for _ in range(options["saved"])),
+                batch_size=batch_size,
+                ignore_conflicts=True,
+            )
+        call_command("recount_news_counters", batch_size=batch_size, stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(f"Seeded data; log in as {prefix}_0 / {options['password']}."))
+
+    def make_news(self, rng, prefix, number, author_id):
+        title = self.sentence(rng, 8).capitalize()
+        content = "\n\n".join(self.sentence(rng, 60) for _ in range(rng.randint(3, 12)))
+        excerpt, reading_time = News.summarize(content)
+        return News(
+            title=title,
+            slug=f"{prefix}-{number}",
+            author_id=author_id,
+            content=content,
+            excerpt=excerpt,
+            reading_time=reading_time,
+            is_published=rng.random() < 0.9,
+        )
+
+    @staticmethod
+    def sentence(rng, words):
+        return " ".join(rng.choice(WORDS) for _ in range(words))
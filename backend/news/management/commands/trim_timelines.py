@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from news.manager.timeline import TimelineManager
+from news.models import TimelineEntry
+
+
+class Command(BaseCommand):
+    help = "Trim every materialized home timeline to its newest TIMELINE_MAX_ENTRIES entries."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--max-entries", type=int, default=settings.TIMELINE_MAX_ENTRIES)
+
+    def handle(self, *args, **options):
+        max_entries = options["max_entries"]
+        oversized = (TimelineEntry.objects.order_by().values("user_id")
+                     .annotate(total=Count("pk")).filter(total__gt=max_entries)
+                     .values_list("user_id", flat=True))
+        users = deleted = 0
+        for user_id in oversized.iterator():
+            deleted += TimelineManager.trim(user_id, max_entries)
+            users += 1
+        self.stdout.write(self.style.SUCCESS(f"Trimmed {deleted} entries from {users} timelines."))
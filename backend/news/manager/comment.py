@@ -1,21 +1,70 @@
+from collections import Counter
+
 from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Case, Count, F, Max, PositiveIntegerField, When
 from django.shortcuts import get_object_or_404
 
-from news.models import Comment
+from news.manager.events import EventManager
+from news.manager.trending import TrendingManager
+from news.models import Comment, News
 
 
 class CommentManager:
     @staticmethod
     def get_by_news(news_id):
-        return Comment.objects.filter(news_id=news_id).select_related("user")
+        return Comment.objects.filter(news_id=news_id, news__deleted_at__isnull=True).select_related("user")
+
+    @staticmethod
+    def get_metadata(news_id):
+        return Comment.objects.filter(news_id=news_id, news__deleted_at__isnull=True).aggregate(
+            count=Count("id"), last_id=Max("id"), last_created_at=Max("created_at")
+        )
 
     @staticmethod
     def create(news, user, content):
         if not content.strip():
             raise ValidationError("Content cannot be empty.")
-        return Comment.objects.create(news=news, user=user, content=content)
+        with transaction.atomic():
+            comment = Comment.objects.create(news=news, user=user, content=content)
+            News.objects.filter(pk=news.pk).update(comment_count=F("comment_count") + 1)
+            TrendingManager.schedule({news.pk: TrendingManager.COMMENT_WEIGHT})
+        EventManager.comments_created([comment])
+        return comment
+
+    @staticmethod
+    def bulk_create(user, items):
+        existing = set(News.objects.filter(id__in={item["news_id"] for item in items}).values_list("id", flat=True))
+        results, comments = [], []
+        for item in items:
+            if item["news_id"] not in existing:
+                results.append({"status": "error", "error": "News item not found"})
+            elif not item["content"].strip():
+                results.append({"status": "error", "error": "Content cannot be empty."})
+            else:
+                comment = Comment(news_id=item["news_id"], user=user, content=item["content"])
+                comments.append(comment)
+                results.append({"status": "created", "comment": comment})
+        if comments:
+            counts = Counter(comment.news_id for comment in comments)
+            with transaction.atomic():
+                Comment.objects.bulk_create(comments)
+                News.objects.filter(pk__in=counts).update(comment_count=Case(
+                    *[When(pk=news_id, then=F("comment_count") + count) for news_id, count in counts.items()],
+                    default=F("comment_count"), output_field=PositiveIntegerField(),
+                ))
+                TrendingManager.schedule({news_id: count * TrendingManager.COMMENT_WEIGHT
+                                        for news_id, count in counts.items()})
+            EventManager.comments_created(comments)
+        return results
 
     @staticmethod
     def delete(comment_id):
         comment = get_object_or_404(Comment, id=comment_id)
-        comment.delete()
+        with transaction.atomic():
+            # A concurrent delete may have removed the row already; only count what this one removed.
+            deleted, _ = Comment.objects.filter(pk=comment.pk).delete()
+            if deleted:
+                News.objects.filter(pk=comment.news_id, comment_count__gte=deleted).update(
+                    comment_count=F("comment_count") - deleted
+                )
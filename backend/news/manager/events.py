@@ -0,0 +1,37 @@
+from django.db import transaction
+
+from config.events import get_hub
+from news.models import Comment, News
+from news.readers import CommentReader, NewsReader
+
+NEWS_CHANNEL = "news"
+NEWS_EVENT_FIELDS = ["id", "title", "slug", "author", "excerpt", "reading_time", "image", "image_variants",
+                     "published_at", "updated_at", "is_published", "comment_count", "save_count"]
+
+
+class EventManager:
+    """Publishes new comments and newly published news to the SSE streams once the transaction commits."""
+
+    @staticmethod
+    def comments_channel(news_id):
+        return f"comments:{news_id}"
+
+    @staticmethod
+    def news_published(news):
+        transaction.on_commit(lambda: EventManager.publish_news(news.id))
+
+    @staticmethod
+    def comments_created(comments):
+        transaction.on_commit(lambda: EventManager.publish_comments([comment.id for comment in comments]))
+
+    @staticmethod
+    def publish_news(news_id):
+        rows = NewsReader.values(News.objects.filter(id=news_id, is_published=True), NEWS_EVENT_FIELDS)
+        for item in NewsReader.render(rows, NEWS_EVENT_FIELDS):
+            get_hub().publish(NEWS_CHANNEL, "news", item)
+
+    @staticmethod
+    def publish_comments(comment_ids):
+        rows = CommentReader.values(Comment.objects.filter(id__in=comment_ids).order_by("id"), CommentReader.fields)
+        for item in CommentReader.render(rows, CommentReader.fields):
+            get_hub().publish(EventManager.comments_channel(item["news"]), "comment", item)
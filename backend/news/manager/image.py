@@ -0,0 +1,81 @@
+import json
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from jobs.manager import JobManager
+from news.cache import NewsCache
+from news.images import content_hash, render_variants
+from news.models import News
+
+
+class NewsImageManager:
+    @staticmethod
+    def schedule(news):
+        if news.image:
+            JobManager.enqueue("news.build_image_variants", {"news_id": news.id, "image_name": news.image.name})
+
+    @staticmethod
+    def build(news_id, image_name):
+        if not News.objects.filter(pk=news_id, image=image_name).exists():
+            return  # The image was replaced or the news deleted since the job was queued.
+        with default_storage.open(image_name, "rb") as image_file:
+            source = image_file.read()
+        digest = content_hash(source)
+        if NewsImageManager.reuse(news_id, digest):
+            return
+        rendered = render_variants(source, settings.NEWS_IMAGE_WIDTHS, settings.NEWS_IMAGE_QUALITY)
+        NewsImageManager.store(news_id, digest, rendered)
+
+    @staticmethod
+    def get_directory(digest):
+        return f"news_images/variants/{digest[:2]}/{digest}"
+
+    @staticmethod
+    def reuse(news_id, digest):
+        """Points the news at variants already built for the same content, found by their manifest in storage."""
+        manifest = f"{NewsImageManager.get_directory(digest)}/variants.json"
+        if not default_storage.exists(manifest):
+            return False
+        with default_storage.open(manifest, "rb") as manifest_file:
+            NewsImageManager.save_variants(news_id, json.load(manifest_file))
+        return True
+
+    @staticmethod
+    def store(news_id, digest, rendered):
+        directory = NewsImageManager.get_directory(digest)
+        sources = {}
+        for width, encoded in rendered["variants"].items():
+            sources[str(width)] = {}
+            for ext, content in encoded.items():
+                name = f"{directory}/{width}.{ext}"
+                if not default_storage.exists(name):
+                    name = default_storage.save(name, ContentFile(content))
+                sources[str(width)][ext] = name
+        variants = {"hash": digest, "placeholder": rendered["placeholder"], "sources": sources}
+        # Written last, so a manifest only ever lists files that exist.
+        manifest = f"{directory}/variants.json"
+        if not default_storage.exists(manifest):
+            default_storage.save(manifest, ContentFile(json.dumps(variants).encode()))
+        NewsImageManager.save_variants(news_id, variants)
+        return variants
+
+    @staticmethod
+    def save_variants(news_id, variants):
+        News.objects.filter(pk=news_id).update(image_variants=variants, updated_at=timezone.now())
+        NewsCache.bump_version()
+
+    @staticmethod
+    def get_urls(variants, request=None):
+        if not variants:
+            return None
+        build_url = request.build_absolute_uri if request else str
+        return {
+            "placeholder": variants["placeholder"],
+            "sources": {
+                width: {ext: build_url(default_storage.url(name)) for ext, name in formats.items()}
+                for width, formats in variants["sources"].items()
+            },
+        }
@@ -1,6 +1,19 @@
+from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.db import connections, router, transaction
+from django.db.models import Exists, OuterRef, Q
 from django.shortcuts import get_object_or_404
-from news.models import News, Comment
+from django.utils import timezone
+
+from jobs.manager import JobManager
+from news.cache import NewsCache
+from news.manager.events import EventManager
+from news.manager.image import NewsImageManager
+from news.manager.timeline import TimelineManager
+from news.models import News, Comment, SavedNews, TimelineEntry, TrendingScore
+
+# Rows that reference a news item, in the order the purger removes them.
+PURGED_MODELS = [Comment, SavedNews, TimelineEntry, TrendingScore]
 
 
 class NewsManager:
@@ -13,6 +26,18 @@ class NewsManager:
         else:
             raise ValueError("Either news_id or slug must be provided.")
 
+    @staticmethod
+    async def aget_by_id(news_id):
+        return await News.objects.select_related("author").filter(id=news_id).afirst()
+
+    @staticmethod
+    def get_metadata(news_id, user):
+        saved = SavedNews.objects.filter(news=OuterRef("pk"), user_id=user.pk)
+        return (News.objects.filter(id=news_id)
+                .values("updated_at", "comment_count", "save_count")
+                .annotate(is_saved=Exists(saved))
+                .first())
+
     @staticmethod
     def get_all_news():
         return News.objects.filter(is_published=True).select_related("author")
@@ -21,26 +46,95 @@ class NewsManager:
     def get_by_user(user_id):
         return News.objects.filter(author_id=user_id).select_related("author")
 
+    @staticmethod
+    def get_exportable(user):
+        return News.objects.filter(Q(is_published=True) | Q(author_id=user.pk)).select_related("author")
+
     @staticmethod
     def create(title, author, content, image=None, is_published=False):
         if not content.strip():
             raise ValidationError("Content cannot be empty.")
-        return News.objects.create(title=title, author=author, content=content, image=image, is_published=is_published)
+        news = News.objects.create(title=title, author=author, content=content, image=image, is_published=is_published)
+        NewsImageManager.schedule(news)
+        if is_published:
+            TimelineManager.publish(news)
+            EventManager.news_published(news)
+        transaction.on_commit(NewsCache.bump_version)
+        return news
 
     @staticmethod
-    def update(news, title=None, content=None, image=None, is_published=None):
+    def update(news, title=None, author=None, content=None, image=None, is_published=None):
         if title is not None:
             news.title = title
+        if author is not None:
+            news.author = author
         if content is not None:
             news.content = content
         if image is not None:
             news.image = image
+            news.image_variants = {}
+        was_published = news.is_published
         if is_published is not None:
             news.is_published = is_published
         news.save()
+        if image is not None:
+            NewsImageManager.schedule(news)
+        if news.is_published and not was_published:
+            TimelineManager.publish(news)
+            EventManager.news_published(news)
+        elif was_published and not news.is_published:
+            TimelineManager.retract(news)
+        transaction.on_commit(NewsCache.bump_version)
         return news
 
     @staticmethod
     def delete(news_id=None, slug=None):
+        """
+        Hides the news item at once and leaves removing it to the ``news.purge`` job.
+
+        Deleting it in place would make the collector load every comment and save
+        into memory and hold their locks for the whole request. Its timeline
+        entries, one per follower, are left to the purge and skipped by readers;
+        its single trending row goes right away, and its slug is renamed so a new
+        item can take it.
+        """
         news = NewsManager.get_by_id(news_id=news_id, slug=slug)
-        news.delete()
+        suffix = f"-deleted-{news.pk}"
+        slug = news.slug[:News._meta.get_field("slug").max_length - len(suffix)] + suffix
+        with transaction.atomic():
+            News.all_objects.filter(pk=news.pk).update(deleted_at=timezone.now(), slug=slug)
+            TrendingScore.objects.filter(news_id=news.pk).delete()
+            JobManager.enqueue("news.purge", {"news_id": news.pk})
+        transaction.on_commit(NewsCache.bump_version)
+
+    @staticmethod
+    def purge(news_id, batch_size=None):
+        """
+        Deletes up to ``batch_size`` rows that reference a deleted news item, then the item itself.
+
+        Returns False while rows remain, so the caller can run it again in a new
+        transaction and keep each one short.
+        """
+        if not News.all_objects.filter(pk=news_id, deleted_at__isnull=False).exists():
+            return True
+        remaining = batch_size or settings.NEWS_PURGE_BATCH_SIZE
+        for model in PURGED_MODELS:
+            remaining -= NewsManager.delete_batch(model, news_id, remaining)
+            if remaining <= 0:
+                return False
+        News.all_objects.filter(pk=news_id).delete()
+        return True
+
+    @staticmethod
+    def delete_batch(model, news_id, limit):
+        """Deletes up to ``limit`` rows of ``model`` that reference ``news_id`` with one DELETE, skipping the collector."""
+        connection = connections[router.db_for_write(model)]
+        table = connection.ops.quote_name(model._meta.db_table)
+        pk = connection.ops.quote_name(model._meta.pk.column)
+        column = connection.ops.quote_name(model._meta.get_field("news").column)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {table} WHERE {pk} IN (SELECT {pk} FROM {table} WHERE {column} = %s LIMIT %s)",
+                [news_id, limit],
+            )
+            return cursor.rowcount
@@ -1,4 +1,10 @@
 from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from jobs.manager import JobManager
+from news.manager.trending import TrendingManager
 from news.models import News, SavedNews
 
 
@@ -7,22 +13,85 @@ class SavedNewsManager:
     def save_news(user, news_id):
         try:
             news = News.objects.get(id=news_id)
-            saved_news, created = SavedNews.objects.get_or_create(user=user, news=news)
+            with transaction.atomic():
+                saved_news, created = SavedNews.objects.get_or_create(user=user, news=news)
+                if created:
+                    News.objects.filter(pk=news.pk).update(save_count=F("save_count") + 1)
+                    TrendingManager.schedule({news.pk: TrendingManager.SAVE_WEIGHT})
             return saved_news, created
         except News.DoesNotExist:
             raise ValidationError("News item not found")
         except Exception as e:
             raise ValidationError(str(e))
 
+    @staticmethod
+    def bulk_save(user, news_ids):
+        news_ids = list(dict.fromkeys(news_ids))
+        existing = set(News.objects.filter(id__in=news_ids).values_list('id', flat=True))
+        already_saved = SavedNewsManager.get_saved_ids(user, existing)
+        to_save = [news_id for news_id in news_ids if news_id in existing and news_id not in already_saved]
+        if to_save:
+            with transaction.atomic():
+                SavedNews.objects.bulk_create([SavedNews(user=user, news_id=news_id) for news_id in to_save],
+                                              ignore_conflicts=True)
+                SavedNewsManager.schedule_recount(to_save)
+                TrendingManager.schedule({news_id: TrendingManager.SAVE_WEIGHT for news_id in to_save})
+        return [
+            {"news_id": news_id,
+             "status": "not_found" if news_id not in existing else
+             "already_saved" if news_id in already_saved else "saved"}
+            for news_id in news_ids
+        ]
+
+    @staticmethod
+    def bulk_unsave(user, news_ids):
+        news_ids = list(dict.fromkeys(news_ids))
+        saved = SavedNewsManager.get_saved_ids(user, news_ids)
+        if saved:
+            with transaction.atomic():
+                SavedNews.objects.filter(user=user, news_id__in=saved).delete()
+                SavedNewsManager.schedule_recount(saved)
+        return [{"news_id": news_id, "status": "unsaved" if news_id in saved else "not_saved"}
+                for news_id in news_ids]
+
+    @staticmethod
+    def schedule_recount(news_ids):
+        JobManager.enqueue("news.refresh_save_counts", {"news_ids": sorted(news_ids)})
+
+    @staticmethod
+    def refresh_save_counts(news_ids):
+        # Recounting instead of adding the batch size keeps the counter exact when
+        # ignore_conflicts skipped rows a concurrent request inserted first.
+        saves = (SavedNews.objects.filter(news=OuterRef('pk')).order_by()
+                 .values('news').annotate(total=Count('pk')).values('total'))
+        News.objects.filter(id__in=news_ids).update(save_count=Coalesce(Subquery(saves), 0))
+
     @staticmethod
     def get_saved_news(user):
-        return SavedNews.objects.filter(user=user).select_related('news')
+        return (SavedNews.objects.filter(user=user, news__deleted_at__isnull=True)
+                .select_related('news__author', 'user'))
+
+    @staticmethod
+    def get_saved_ids(user, news_ids):
+        if not user.is_authenticated or not news_ids:
+            return set()
+        return set(SavedNews.objects.filter(user=user, news_id__in=news_ids).values_list('news_id', flat=True))
+
+    @staticmethod
+    async def aget_saved_ids(user, news_ids):
+        if not user.is_authenticated or not news_ids:
+            return set()
+        queryset = SavedNews.objects.filter(user=user, news_id__in=news_ids).values_list('news_id', flat=True)
+        return {news_id async for news_id in queryset}
 
     @staticmethod
     def unsave_news(user, news_id):
         try:
-            saved_news = SavedNews.objects.get(user=user, news_id=news_id)
-            saved_news.delete()
+            with transaction.atomic():
+                deleted, _ = SavedNews.objects.filter(user=user, news_id=news_id).delete()
+                if not deleted:
+                    raise SavedNews.DoesNotExist
+                News.objects.filter(pk=news_id, save_count__gte=deleted).update(save_count=F("save_count") - deleted)
             return True
         except SavedNews.DoesNotExist:
             raise ValidationError("News not saved by this user")
@@ -0,0 +1,125 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F, Q
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+
+from jobs.manager import JobManager
+from news.export import chunks
+from news.models import News, TimelineEntry
+from users.models import Follow, Users
+
+
+class TimelineManager:
+    """
+    Home timelines of followed authors.
+
+    News of most authors is pushed into a materialized TimelineEntry row per
+    follower when it is published. Authors with too many followers, or who
+    publish too often, are switched to pull: their news is read at query time
+    and merged into the materialized page instead.
+    """
+
+    @staticmethod
+    def follow(follower, author_id):
+        if follower.pk == author_id:
+            raise ValidationError("You cannot follow yourself.")
+        author = get_object_or_404(Users, id=author_id)
+        with transaction.atomic():
+            _, created = Follow.objects.get_or_create(follower=follower, author=author)
+            if created:
+                Users.objects.filter(id=author.id).update(follower_count=F("follower_count") + 1)
+                if not author.timeline_pull:
+                    TimelineManager.backfill(follower, author)
+        return created
+
+    @staticmethod
+    def unfollow(follower, author_id):
+        with transaction.atomic():
+            deleted, _ = Follow.objects.filter(follower=follower, author_id=author_id).delete()
+            if deleted:
+                Users.objects.filter(id=author_id).update(follower_count=F("follower_count") - 1)
+                TimelineEntry.objects.filter(user=follower, news__author_id=author_id).delete()
+        return bool(deleted)
+
+    @staticmethod
+    def backfill(follower, author):
+        recent = (News.objects.filter(author=author, is_published=True)
+                  .order_by("-published_at", "-id")
+                  .values_list("id", "published_at")[:settings.TIMELINE_BACKFILL_ITEMS])
+        TimelineEntry.objects.bulk_create(
+            [TimelineEntry(user=follower, news_id=news_id, published_at=published_at)
+             for news_id, published_at in recent],
+            ignore_conflicts=True,
+        )
+
+    @staticmethod
+    def publish(news):
+        JobManager.enqueue("news.timeline_fan_out", {"news_id": news.id})
+
+    @staticmethod
+    def retract(news):
+        JobManager.enqueue("news.timeline_retract", {"news_id": news.id})
+
+    @staticmethod
+    def should_pull(author):
+        if author.follower_count >= settings.TIMELINE_PUSH_MAX_FOLLOWERS:
+            return True
+        since = timezone.now() - timedelta(days=1)
+        published = News.objects.filter(author_id=author.id, is_published=True, published_at__gte=since).count()
+        return published >= settings.TIMELINE_PROLIFIC_DAILY_POSTS
+
+    @staticmethod
+    def fan_out(news_id):
+        """Writes the news into its followers' timelines and returns how many entries were pushed."""
+        news = News.objects.select_related("author").filter(id=news_id, is_published=True).first()
+        if news is None:
+            return 0
+        author = news.author
+        if author.timeline_pull or TimelineManager.should_pull(author):
+            # Pull is sticky: flipping back would leave gaps in the followers' timelines.
+            if not author.timeline_pull:
+                Users.objects.filter(id=author.id).update(timeline_pull=True)
+            return 0
+        batch_size = settings.TIMELINE_FANOUT_BATCH_SIZE
+        follower_ids = (Follow.objects.filter(author_id=author.id).order_by()
+                        .values_list("follower_id", flat=True).iterator(chunk_size=batch_size))
+        pushed = 0
+        for chunk in chunks(follower_ids, batch_size):
+            TimelineEntry.objects.bulk_create(
+                [TimelineEntry(user_id=user_id, news_id=news.id, published_at=news.published_at) for user_id in chunk],
+                ignore_conflicts=True,
+            )
+            pushed += len(chunk)
+        return pushed
+
+    @staticmethod
+    def get_sources(user):
+        """
+        Materialized entries and the news of followed pull authors, as rows of ``news_id`` and ``published_at``.
+
+        Entries of deleted news stay until the purge job removes them, so they are skipped here.
+        """
+        pull_authors = Follow.objects.filter(follower_id=user.pk, author__timeline_pull=True).values("author_id")
+        return [
+            TimelineEntry.objects.filter(user_id=user.pk, news__deleted_at__isnull=True).values("news_id", "published_at"),
+            News.objects.filter(author_id__in=pull_authors, is_published=True)
+            .annotate(news_id=F("id")).values("news_id", "published_at"),
+        ]
+
+    @staticmethod
+    def trim(user_id, max_entries):
+        """Deletes the entries of the user beyond the newest ``max_entries``."""
+        cutoff = list(TimelineEntry.objects.filter(user_id=user_id).order_by("-published_at", "-news_id")
+                      .values("published_at", "news_id")[max_entries:max_entries + 1])
+        if not cutoff:
+            return 0
+        cutoff = cutoff[0]
+        deleted, _ = (TimelineEntry.objects.filter(user_id=user_id)
+                      .filter(Q(published_at__lt=cutoff["published_at"])
+                              | Q(published_at=cutoff["published_at"], news_id__lte=cutoff["news_id"]))
+                      .delete())
+        return deleted
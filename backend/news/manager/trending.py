@@ -0,0 +1,58 @@
+import math
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Case, F, FloatField, Value, When
+from django.db.models.functions import Abs, Greatest, Log, Power
+from django.utils import timezone
+
+from jobs.manager import JobManager
+from news.models import News, TrendingScore
+
+EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+MIN_SCORE = -1e9
+
+
+class TrendingManager:
+    COMMENT_WEIGHT = 1
+    SAVE_WEIGHT = 2
+
+    @staticmethod
+    def get_exponent(moment):
+        return (moment - EPOCH).total_seconds() / 3600 / settings.TRENDING_HALF_LIFE_HOURS
+
+    @staticmethod
+    def schedule(weights):
+        """Queues ``record`` for after the write commits, keeping the hot score rows out of request transactions."""
+        JobManager.enqueue("news.record_trending", {
+            "weights": [[news_id, weight] for news_id, weight in weights.items()],
+            "moment": timezone.now().isoformat(),
+        })
+
+    @staticmethod
+    def record(weights, moment=None):
+        """Folds events into the scores, ``weights`` mapping news ids to the total weight of their new events."""
+        weights = {news_id: weight for news_id, weight in weights.items() if weight > 0}
+        if not weights:
+            return
+        exponent = TrendingManager.get_exponent(moment or timezone.now())
+        TrendingScore.objects.bulk_create([TrendingScore(news_id=news_id, score=MIN_SCORE) for news_id in weights],
+                                          ignore_conflicts=True)
+        added = Case(
+            *[When(pk=news_id, then=Value(math.log2(weight) + exponent)) for news_id, weight in weights.items()],
+            output_field=FloatField(),
+        )
+        # log2(2**a + 2**b) == max(a, b) + log2(1 + 2**-|a - b|), which never overflows. Rows just
+        # inserted take ``added`` as is, since 2**(MIN_SCORE - added) underflows to an error on Postgres.
+        TrendingScore.objects.filter(pk__in=weights).update(
+            score=Case(
+                When(score=MIN_SCORE, then=added),
+                default=Greatest(F("score"), added) + Log(2, 1 + Power(2, -Abs(F("score") - added))),
+                output_field=FloatField(),
+            ),
+            updated_at=timezone.now(),
+        )
+
+    @staticmethod
+    def get_trending():
+        return News.objects.filter(is_published=True, trending__isnull=False)
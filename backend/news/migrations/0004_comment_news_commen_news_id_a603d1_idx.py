@@ -0,0 +1,19 @@
+# Generated by Django 5.1.7 on 2026-10-18 12:52
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0003_savednews'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['news', '-created_at', '-id'], name='news_commen_news_id_a603d1_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.7 on 2026-10-18 12:55
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    News = apps.get_model('news', 'News')
+    Comment = apps.get_model('news', 'Comment')
+    SavedNews = apps.get_model('news', 'SavedNews')
+    comments = Comment.objects.filter(news=OuterRef('pk')).order_by().values('news').annotate(total=Count('pk'))
+    saves = SavedNews.objects.filter(news=OuterRef('pk')).order_by().values('news').annotate(total=Count('pk'))
+    News.objects.update(
+        comment_count=Coalesce(Subquery(comments.values('total')), 0),
+        save_count=Coalesce(Subquery(saves.values('total')), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0005_news_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='news',
+            name='save_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
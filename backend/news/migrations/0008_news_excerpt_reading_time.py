@@ -0,0 +1,38 @@
+# Generated by Django 5.1.7 on 2026-10-18 13:07
+
+from django.db import migrations, models
+
+import news.models
+
+
+def backfill_summaries(apps, schema_editor):
+    News = apps.get_model('news', 'News')
+    batch = []
+    for row in News.objects.only('id', 'content').order_by('id').iterator(chunk_size=1000):
+        row.excerpt, row.reading_time = news.models.News.summarize(row.content)
+        batch.append(row)
+        if len(batch) >= 1000:
+            News.objects.bulk_update(batch, ['excerpt', 'reading_time'])
+            batch.clear()
+    News.objects.bulk_update(batch, ['excerpt', 'reading_time'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0007_news_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=300),
+        ),
+        migrations.AddField(
+            model_name='news',
+            name='reading_time',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
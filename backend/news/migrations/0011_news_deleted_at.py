@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 13:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0010_timelineentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,31 @@
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class AddIndexOnPostgres(migrations.AddIndex):
+    """Records the index in every project state but only builds it on PostgreSQL."""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != "postgresql":
+            return
+        # 0005 used to create this index with raw SQL; drop it (IF EXISTS) so it is rebuilt from the declaration.
+        schema_editor.remove_index(to_state.apps.get_model(app_label, self.model_name), self.index)
+        super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0011_news_deleted_at'),
+    ]
+
+    operations = [
+        AddIndexOnPostgres(
+            model_name='news',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='news_news_search_vector_gin'),
+        ),
+    ]
@@ -1,26 +1,86 @@
-from django.db import models
-from django.utils.text import slugify
+import math
+
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db import connection, models
+from django.utils.text import Truncator, slugify
 from users.models import Users
 
+EXCERPT_WORDS = 40
+WORDS_PER_MINUTE = 200
+
+
+class LiveNewsManager(models.Manager):
+    """Leaves out news that were deleted and are waiting to be purged."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
 
 class News(models.Model):
     title = models.CharField(max_length=255, db_index=True)
     slug = models.SlugField(max_length=255, unique=True, blank=True)
     author = models.ForeignKey(Users, on_delete=models.CASCADE, related_name="news")
     content = models.TextField()
+    excerpt = models.CharField(max_length=300, blank=True, editable=False)
+    reading_time = models.PositiveSmallIntegerField(default=0, editable=False)
     image = models.ImageField(upload_to="news_images/%Y/%m/", blank=True, null=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     published_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_published = models.BooleanField(default=False, db_index=True)
+    comment_count = models.PositiveIntegerField(default=0)
+    save_count = models.PositiveIntegerField(default=0)
+    search_vector = SearchVectorField(null=True, editable=False)
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False, db_index=True)
+
+    objects = LiveNewsManager()
+    all_objects = models.Manager()
 
     class Meta:
         ordering = ["-published_at"]
-        indexes = [models.Index(fields=["slug"])]
+        indexes = [
+            models.Index(fields=["slug"]),
+            GinIndex(fields=["search_vector"], name="news_news_search_vector_gin"),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        news = super().from_db(db, field_names, values)
+        news._indexed_text = news.get_indexed_text()
+        return news
+
+    def get_indexed_text(self):
+        # Read from __dict__ so that a deferred field is not loaded just to be compared.
+        return self.__dict__.get("title"), self.__dict__.get("content")
 
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.title)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "content" in update_fields:
+            self.excerpt, self.reading_time = News.summarize(self.content)
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "excerpt", "reading_time"}
+        reindex = ((update_fields is None or {"title", "content"} & set(update_fields))
+                   and getattr(self, "_indexed_text", None) != self.get_indexed_text())
         super().save(*args, **kwargs)
+        if reindex:
+            News.update_search_vector(News.objects.filter(pk=self.pk))
+            self._indexed_text = self.get_indexed_text()
+
+    @staticmethod
+    def summarize(content):
+        words = content.split()
+        excerpt = Truncator(" ".join(words[:EXCERPT_WORDS + 1])).words(EXCERPT_WORDS)
+        return Truncator(excerpt).chars(300), math.ceil(len(words) / WORDS_PER_MINUTE)
+
+    @staticmethod
+    def update_search_vector(queryset):
+        if connection.vendor != "postgresql":
+            return
+        queryset.update(search_vector=SearchVector("title", weight="A", config="english")
+                        + SearchVector("content", weight="B", config="english"))
 
     def __str__(self):
         return self.title
@@ -34,6 +94,7 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [models.Index(fields=["news", "-created_at", "-id"])]
 
     def __str__(self):
         return f"Comment by {self.user.username} on {self.news.title}"
@@ -49,3 +110,37 @@ class SavedNews(models.Model):
 
     def __str__(self):
         return f"{self.user.username} saved {self.news.title}"
+
+
+class TrendingScore(models.Model):
+    """
+    Time-decayed popularity of a news item, kept in log2 space.
+
+    ``score`` is log2 of the sum of ``weight * 2 ** (hours / half-life)`` over the
+    item's comments and saves. Decay is the same for every row, so the ordering
+    never needs old scores to be decayed, and new events can be folded in with
+    an UPDATE.
+    """
+    news = models.OneToOneField(News, on_delete=models.CASCADE, primary_key=True, related_name="trending")
+    score = models.FloatField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["-score", "-news"])]
+
+    def __str__(self):
+        return f"{self.news_id}: {self.score:.3f}"
+
+
+class TimelineEntry(models.Model):
+    """A published news item materialized into a follower's home timeline."""
+    user = models.ForeignKey(Users, on_delete=models.CASCADE, related_name="timeline")
+    news = models.ForeignKey(News, on_delete=models.CASCADE, related_name="timeline_entries")
+    published_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ("user", "news")
+        indexes = [models.Index(fields=["user", "-published_at", "-news"])]
+
+    def __str__(self):
+        return f"{self.news_id} in timeline of {self.user_id}"
@@ -0,0 +1,194 @@
+import heapq
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import namedtuple
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+Cursor = namedtuple("Cursor", ["reverse", "position"])
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination keyed on ``(ordering_field, tiebreaker_field)``, newest first.
+
+    Each page is a single range scan that starts right after the last row the
+    client has seen, so the cost does not grow with the depth of the page.
+    """
+    ordering_field = None
+    ordering_type = datetime
+    tiebreaker_field = "pk"
+    tiebreaker_type = int
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    invalid_cursor_message = "Invalid cursor"
+
+    def __init__(self):
+        self.page_size = settings.PAGE_SIZE
+        self.max_page_size = settings.MAX_PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.paginate_rows(list(self.get_page_queryset(queryset, request)))
+
+    def paginate_sequence(self, items, request):
+        """Paginate an in-memory sequence that is already sorted newest/highest first."""
+        self.prepare(request)
+        reverse, position = self.cursor
+        if position is not None:
+            position = tuple(position)
+            if reverse:
+                items = [item for item in items if self.get_position(item) > position][::-1]
+            else:
+                items = [item for item in items if self.get_position(item) < position]
+        elif reverse:
+            items = items[::-1]
+        return self.paginate_rows(list(items[:self.page_size + 1]))
+
+    def paginate_merged(self, querysets, request):
+        """Paginate several querysets that share the ordering fields, merging their pages and dropping duplicates."""
+        pages = [list(self.get_page_queryset(queryset, request)) for queryset in querysets]
+        rows, seen = [], set()
+        for row in heapq.merge(*pages, key=self.get_position, reverse=not self.cursor.reverse):
+            position = self.get_position(row)
+            if position not in seen:
+                seen.add(position)
+                rows.append(row)
+        return self.paginate_rows(rows[:self.page_size + 1])
+
+    def get_page_queryset(self, queryset, request):
+        self.prepare(request)
+        reverse, position = self.cursor
+        if position is not None:
+            queryset = queryset.filter(self.get_position_filter(position, reverse))
+        return queryset.order_by(*self.get_ordering(reverse))[:self.page_size + 1]
+
+    def prepare(self, request):
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.cursor = self.decode_cursor(request)
+
+    def paginate_rows(self, rows):
+        reverse, position = self.cursor
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.page = rows
+        return rows
+
+    def get_ordering(self, reverse=False):
+        prefix = "" if reverse else "-"
+        return [prefix + self.ordering_field, prefix + self.tiebreaker_field]
+
+    def get_position_filter(self, position, reverse=False):
+        value, key = position
+        lookup = "gt" if reverse else "lt"
+        return (Q(**{f"{self.ordering_field}__{lookup}": value})
+                | Q(**{self.ordering_field: value, f"{self.tiebreaker_field}__{lookup}": key}))
+
+    def get_position(self, instance):
+        return (self.get_value(instance, self.ordering_field),
+                self.get_value(instance, self.tiebreaker_field))
+
+    @staticmethod
+    def get_value(instance, field_name):
+        if isinstance(instance, dict):
+            return instance[field_name]
+        return getattr(instance, field_name)
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.GET[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def decode_cursor(self, request):
+        encoded = request.GET.get(self.cursor_query_param)
+        if not encoded:
+            return Cursor(reverse=False, position=None)
+        try:
+            payload = json.loads(urlsafe_b64decode(encoded.encode("ascii")))
+            value, key = payload["p"]
+            position = (self.parse_value(value, self.ordering_type), self.parse_value(key, self.tiebreaker_type))
+            return Cursor(reverse=bool(payload.get("r")), position=position)
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+    @staticmethod
+    def parse_value(value, value_type):
+        """Checks a cursor value against the type of its field, so a tampered cursor never reaches the query."""
+        if value_type is datetime:
+            parsed = parse_datetime(value) if isinstance(value, str) else None
+            if parsed is None:
+                raise ValueError(value)
+            return parsed if timezone.is_aware(parsed) else timezone.make_aware(parsed)
+        allowed = (int, float) if value_type is float else (int,)
+        if isinstance(value, bool) or not isinstance(value, allowed):
+            raise TypeError(value)
+        return value_type(value)
+
+    def encode_cursor(self, cursor):
+        value, key = cursor.position
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        payload = {"p": [value, key]}
+        if cursor.reverse:
+            payload["r"] = 1
+        encoded = urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(Cursor(reverse=False, position=self.get_position(self.page[-1])))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        position = self.get_position(self.page[0]) if self.page else self.cursor.position
+        return self.encode_cursor(Cursor(reverse=True, position=position))
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
+
+
+class NewsCursorPagination(KeysetPagination):
+    ordering_field = "published_at"
+
+
+class CommentCursorPagination(KeysetPagination):
+    ordering_field = "created_at"
+
+
+class SearchCursorPagination(KeysetPagination):
+    ordering_field = "rank"
+    ordering_type = float
+
+
+class TrendingCursorPagination(KeysetPagination):
+    ordering_field = "trending__score"
+    ordering_type = float
+    tiebreaker_field = "trending__news_id"
+
+
+class TimelineCursorPagination(KeysetPagination):
+    ordering_field = "published_at"
+    tiebreaker_field = "news_id"
@@ -0,0 +1,138 @@
+import math
+import re
+from collections import Counter, defaultdict
+
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import F
+from django.utils.html import escape
+
+from config.routers import RoutingState
+from news.cache import NewsCache
+from news.models import News
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_STOP = "</mark>"
+# ts_headline returns the raw content, so it marks matches with private-use characters
+# that are turned into HIGHLIGHT_START/STOP only after the snippet has been escaped.
+HEADLINE_START_SEL = "\ue000"
+HEADLINE_STOP_SEL = "\ue001"
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+def render_headline(headline):
+    return escape(headline).replace(HEADLINE_START_SEL, HIGHLIGHT_START).replace(HEADLINE_STOP_SEL, HIGHLIGHT_STOP)
+
+
+class InvertedIndex:
+    """
+    Pure-Python stand-in for the Postgres ``tsvector`` index.
+
+    Used on backends without full-text search (SQLite test and benchmark runs).
+    Each process holds the published content in memory, so it is not meant for
+    production data.
+    It ranks with a simple tf-idf in which title hits weigh more than content
+    hits, and requires every query term to match, like ``websearch_to_tsquery``.
+    """
+    title_weight = 2.0
+    snippet_words = 30
+
+    def __init__(self, rows):
+        self.postings = defaultdict(dict)
+        self.documents = {}
+        for pk, title, content in rows:
+            self.documents[pk] = content
+            weights = Counter()
+            for token in tokenize(title):
+                weights[token] += self.title_weight
+            for token in tokenize(content):
+                weights[token] += 1
+            for token, weight in weights.items():
+                self.postings[token][pk] = weight
+
+    def search(self, query):
+        terms = set(tokenize(query))
+        if not terms or any(term not in self.postings for term in terms):
+            return []
+        matches = set.intersection(*(set(self.postings[term]) for term in terms))
+        total = len(self.documents)
+        hits = []
+        for pk in matches:
+            rank = sum(
+                (1 + math.log(self.postings[term][pk])) * math.log(1 + total / len(self.postings[term]))
+                for term in terms
+            )
+            hits.append({"pk": pk, "rank": rank})
+        hits.sort(key=lambda hit: (hit["rank"], hit["pk"]), reverse=True)
+        return hits
+
+    def headline(self, pk, query):
+        terms = set(tokenize(query))
+        words = self.documents[pk].split()
+        start = next((i for i, word in enumerate(words) if terms & set(tokenize(word))), 0)
+        start = max(0, start - self.snippet_words // 3)
+        snippet = []
+        for word in words[start:start + self.snippet_words]:
+            if terms & set(tokenize(word)):
+                snippet.append(f"{HIGHLIGHT_START}{escape(word)}{HIGHLIGHT_STOP}")
+            else:
+                snippet.append(escape(word))
+        return " ".join(snippet)
+
+
+class NewsSearch:
+    _index = (None, None)
+
+    @staticmethod
+    def is_native():
+        return connection.vendor == "postgresql"
+
+    @staticmethod
+    def get_queryset(query):
+        search_query = SearchQuery(query, search_type="websearch", config="english")
+        return (
+            News.objects.filter(is_published=True, search_vector=search_query)
+            .select_related("author")
+            .annotate(
+                rank=SearchRank(F("search_vector"), search_query),
+                headline=SearchHeadline(
+                    "content", search_query, config="english",
+                    start_sel=HEADLINE_START_SEL, stop_sel=HEADLINE_STOP_SEL, max_words=35, min_words=15,
+                ),
+            )
+        )
+
+    @staticmethod
+    def get_index():
+        version = NewsCache.get_version()
+        cached_version, index = NewsSearch._index
+        if cached_version != version:
+            rows = News.objects.filter(is_published=True).values_list("id", "title", "content")
+            with RoutingState(pinned=True).active():
+                index = InvertedIndex(rows.iterator(chunk_size=2000))
+            NewsSearch._index = (version, index)
+        return index
+
+    @staticmethod
+    def paginate(query, paginator, request):
+        if NewsSearch.is_native():
+            results = paginator.paginate_queryset(NewsSearch.get_queryset(query), request)
+            for item in results:
+                item.headline = render_headline(item.headline)
+            return results
+        index = NewsSearch.get_index()
+        hits = paginator.paginate_sequence(index.search(query), request)
+        news = News.objects.select_related("author").in_bulk([hit["pk"] for hit in hits])
+        results = []
+        for hit in hits:
+            item = news.get(hit["pk"])
+            if item is None:
+                continue
+            item.rank = hit["rank"]
+            item.headline = index.headline(hit["pk"], query)
+            results.append(item)
+        return results
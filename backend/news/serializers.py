@@ -1,4 +1,9 @@
+from django.conf import settings
 from rest_framework import serializers
+
+from news.manager.comment import CommentManager
+from news.manager.image import NewsImageManager
+from news.manager.news import NewsManager
 from news.models import News, Comment, SavedNews
 from users.models import Users
 
@@ -9,18 +14,48 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ["id", "username"]
 
 
-class NewsSerializer(serializers.ModelSerializer):
+class SparseFieldsMixin:
+    """Renders only the fields chosen through the ``fields=`` / ``exclude=`` query parameters."""
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop("fields", None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in [name for name, field in self.fields.items() if not field.write_only and name not in fields]:
+                self.fields.pop(name)
+
+    @classmethod
+    def select_fields(cls, query_params, default=None):
+        readable = [name for name, field in cls().fields.items() if not field.write_only]
+        if "fields" in query_params:
+            selected = [name for name in query_params["fields"].split(",") if name]
+        else:
+            selected = list(default or readable)
+        excluded = [name for name in query_params.get("exclude", "").split(",") if name]
+        unknown = sorted(set(selected + excluded) - set(readable))
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        return [name for name in readable if name in selected and name not in excluded]
+
+
+class NewsSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    compact_fields = ["id", "title", "slug", "author", "excerpt", "reading_time", "image", "image_variants",
+                      "published_at", "updated_at", "is_published", "comment_count", "save_count", "is_saved"]
+
     author = UserSerializer(read_only=True)
     author_id = serializers.PrimaryKeyRelatedField(
         queryset=Users.objects.all(), source="author", write_only=True
     )
+    image_variants = serializers.SerializerMethodField()
     is_saved = serializers.SerializerMethodField()
 
     class Meta:
         model = News
-        fields = ["id", "title", "slug", "author", "author_id", "content", "image",
-                  "published_at", "updated_at", "is_published", "is_saved"]
-        read_only_fields = ["published_at", "updated_at", "slug", "is_saved"]
+        fields = ["id", "title", "slug", "author", "author_id", "content", "excerpt", "reading_time", "image",
+                  "image_variants", "published_at", "updated_at", "is_published", "comment_count", "save_count",
+                  "is_saved"]
+        read_only_fields = ["published_at", "updated_at", "slug", "excerpt", "reading_time", "comment_count",
+                            "save_count", "is_saved"]
 
     @staticmethod
     def validate_title(value):
@@ -28,7 +63,19 @@ class NewsSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Title must be at least 3 characters long.")
         return value
 
+    def create(self, validated_data):
+        return NewsManager.create(**validated_data)
+
+    def update(self, instance, validated_data):
+        return NewsManager.update(instance, **validated_data)
+
+    def get_image_variants(self, obj):
+        return NewsImageManager.get_urls(obj.image_variants, self.context.get('request'))
+
     def get_is_saved(self, obj):
+        saved_ids = self.context.get('saved_ids')
+        if saved_ids is not None:
+            return obj.id in saved_ids
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             exists = SavedNews.objects.filter(user=request.user, news=obj).exists()
@@ -36,6 +83,14 @@ class NewsSerializer(serializers.ModelSerializer):
         return False
 
 
+class NewsSearchSerializer(NewsSerializer):
+    rank = serializers.FloatField(read_only=True)
+    headline = serializers.CharField(read_only=True)
+
+    class Meta(NewsSerializer.Meta):
+        fields = NewsSerializer.Meta.fields + ["rank", "headline"]
+
+
 class CommentSerializer(serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     user_id = serializers.PrimaryKeyRelatedField(
@@ -53,6 +108,23 @@ class CommentSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Content cannot be empty.")
         return value
 
+    def create(self, validated_data):
+        return CommentManager.create(**validated_data)
+
+
+class BulkCommentItemSerializer(serializers.Serializer):
+    news_id = serializers.IntegerField()
+    content = serializers.CharField(allow_blank=True, trim_whitespace=False)
+
+
+class BulkCommentSerializer(serializers.Serializer):
+    comments = BulkCommentItemSerializer(many=True, allow_empty=False, max_length=settings.BULK_MAX_ITEMS)
+
+
+class BulkNewsIdsSerializer(serializers.Serializer):
+    news_ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False,
+                                     max_length=settings.BULK_MAX_ITEMS)
+
 
 class SavedNewsSerializer(serializers.ModelSerializer):
     news_title = serializers.CharField(source='news.title', read_only=True)
@@ -0,0 +1,134 @@
+"""
+Server-Sent Events served straight from ASGI, in front of Django.
+
+A stream skips the middleware and view stack: it authenticates once, subscribes
+to the hub and then only waits, so an idle connection costs a queue and two
+tasks on the worker's event loop.
+"""
+import asyncio
+import re
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from rest_framework import exceptions
+
+from config.events import get_hub
+from config.renderers import ORJSONRenderer
+from news.manager.events import NEWS_CHANNEL, EventManager
+from users.authentication import (AsyncJSONWebTokenAuthentication, check_password_fingerprint,
+                                  jwt_get_username_from_payload)
+from users.models import Users
+
+ROUTES = [
+    (re.compile(r"^/events/news/$"), lambda match: [NEWS_CHANNEL]),
+    (re.compile(r"^/events/comments/(?P<news_id>\d+)/$"),
+     lambda match: [EventManager.comments_channel(int(match["news_id"]))]),
+]
+
+
+def resolve_channels(path):
+    for pattern, channels in ROUTES:
+        match = pattern.match(path)
+        if match:
+            return channels(match)
+    return None
+
+
+def get_token(scope):
+    headers = dict(scope["headers"])
+    prefix, _, token = headers.get(b"authorization", b"").decode("latin-1").partition(" ")
+    if token and prefix.lower() == "bearer":
+        return token
+    # EventSource cannot send headers, so browsers pass the token in the query string.
+    return parse_qs(scope["query_string"].decode("latin-1")).get("token", [None])[0]
+
+
+async def authenticate(scope):
+    token = get_token(scope)
+    if not token:
+        raise exceptions.AuthenticationFailed("Authentication credentials were not provided.")
+    payload = AsyncJSONWebTokenAuthentication.decode_payload(token)
+    username = jwt_get_username_from_payload(payload)
+    try:
+        password = username and await (Users.objects.filter(username=username, is_active=True)
+                                       .values_list("password", flat=True).afirst())
+    finally:
+        # Streams bypass Django's request signals, so release the connection the way they would.
+        await sync_to_async(close_old_connections)()
+    if not password:
+        raise exceptions.AuthenticationFailed("Invalid signature.")
+    check_password_fingerprint(payload, password)
+
+
+def cors_headers(scope):
+    origin = dict(scope["headers"]).get(b"origin")
+    if not origin or not settings.CORS_ALLOW_ALL_ORIGINS:
+        return []
+    return [(b"access-control-allow-origin", origin), (b"access-control-allow-credentials", b"true")]
+
+
+class EventStreamApp:
+    """Serves ``/events/news/`` and ``/events/comments/<news_id>/`` and passes everything else to Django."""
+
+    def __init__(self, application):
+        self.application = application
+
+    async def __call__(self, scope, receive, send):
+        channels = resolve_channels(scope["path"]) if scope["type"] == "http" else None
+        if channels is None:
+            return await self.application(scope, receive, send)
+        if scope["method"] != "GET":
+            return await self.reject(scope, send, 405, {"detail": f'Method "{scope["method"]}" not allowed.'})
+        try:
+            await authenticate(scope)
+        except exceptions.AuthenticationFailed as exc:
+            return await self.reject(scope, send, 401, {"detail": exc.detail})
+        await self.stream(scope, receive, send, channels)
+
+    async def stream(self, scope, receive, send, channels):
+        subscription = get_hub().subscribe(channels)
+        disconnected = asyncio.ensure_future(self.wait_for_disconnect(receive))
+        message = None
+        try:
+            await send({
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"text/event-stream"), (b"cache-control", b"no-cache"),
+                            (b"x-accel-buffering", b"no"), *cors_headers(scope)],
+            })
+            await send({"type": "http.response.body", "body": f"retry: {settings.EVENTS_RETRY_MS}\n\n".encode(),
+                        "more_body": True})
+            while True:
+                if message is None:
+                    message = asyncio.ensure_future(subscription.queue.get())
+                done, _ = await asyncio.wait({message, disconnected}, timeout=settings.EVENTS_HEARTBEAT_SECONDS,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if disconnected in done:
+                    break
+                if message in done:
+                    body, message = message.result(), None
+                    if body is None:
+                        break
+                else:
+                    body = b": ping\n\n"
+                await send({"type": "http.response.body", "body": body, "more_body": True})
+            if not disconnected.done():
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            subscription.close()
+            for task in (message, disconnected):
+                if task is not None:
+                    task.cancel()
+
+    @staticmethod
+    async def wait_for_disconnect(receive):
+        while (await receive())["type"] != "http.disconnect":
+            pass
+
+    @staticmethod
+    async def reject(scope, send, status, data):
+        await send({"type": "http.response.start", "status": status,
+                    "headers": [(b"content-type", b"application/json"), *cors_headers(scope)]})
+        await send({"type": "http.response.body", "body": ORJSONRenderer().render(data)})
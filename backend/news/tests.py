@@ -1,3 +1,1091 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import io
+import json
+import math
+import tempfile
+from base64 import urlsafe_b64encode
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from PIL import Image
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APIRequestFactory
+
+from config import middleware
+from config.events import get_hub
+from config.renderers import ORJSONRenderer
+from config.routers import PrimaryReplicaRouter, RoutingState
+from config.throttling import CacheStore, MemoryStore, SlidingWindowLimiter, get_client_ip, parse_rate
+from jobs.manager import JobManager
+from jobs.models import Job
+from news.cache import NewsCache
+from news.manager.comment import CommentManager
+from news.manager.news import NewsManager
+from news.manager.timeline import TimelineManager
+from news.manager.trending import TrendingManager
+from news.models import Comment, News, SavedNews, TimelineEntry, TrendingScore
+from news.streams import EventStreamApp
+from news.readers import CommentReader, NewsReader
+from news.search import HEADLINE_START_SEL, HEADLINE_STOP_SEL, render_headline
+from news.serializers import CommentSerializer, NewsSerializer
+from users.managers import AuthManager
+from users.models import Follow, Users
+
+
+class NewsListQueryCountTests(TestCase):
+    def setUp(self):
+        self.user = Users.objects.create_user(username="reader", password="secret123")
+        self.author = Users.objects.create_user(username="author", password="secret123")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        cache.clear()
+        caches["shared"].clear()
+
+    def create_news(self, count):
+        News.objects.bulk_create(
+            News(title=f"News {i}", slug=f"news-{i}", author=self.author, content="Content", is_published=True)
+            for i in range(count)
+        )
+        SavedNews.objects.bulk_create(
+            SavedNews(user=self.user, news=news) for news in News.objects.all()[::2]
+        )
+
+    def test_is_saved_query_count_does_not_depend_on_page_size(self):
+        self.create_news(50)
+        for page_size in (5, 50):
+            with self.assertNumQueries(2):
+                response = self.client.get("/news/", {"page_size": page_size})
+            self.assertEqual(len(response.data["results"]), page_size)
+
+    def test_list_is_compact_and_skips_content_column(self):
+        self.create_news(3)
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get("/news/")
+        self.assertNotIn("content", response.data["results"][0])
+        self.assertIn("excerpt", response.data["results"][0])
+        self.assertNotIn('"content"', captured.captured_queries[0]["sql"])
+
+    def test_fields_and_exclude_trim_the_representation(self):
+        self.create_news(3)
+        response = self.client.get("/news/", {"fields": "id,title,content"})
+        self.assertEqual(set(response.data["results"][0]), {"id", "title", "content"})
+        response = self.client.get("/my-news/", {"exclude": "author,is_saved"})
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get("/news/", {"exclude": "author"})
+        self.assertNotIn("author", response.data["results"][0])
+        self.assertEqual(self.client.get("/news/", {"fields": "password"}).status_code, 400)
+
+    def test_is_saved_without_id(self):
+        self.create_news(4)
+        ids = [item["id"] for item in self.client.get("/news/", {"fields": "id"}).data["results"]]
+        saved_ids = set(SavedNews.objects.filter(user=self.user).values_list("news_id", flat=True))
+        response = self.client.get("/news/", {"fields": "is_saved"})
+        self.assertEqual(response.data["results"], [{"is_saved": news_id in saved_ids} for news_id in ids])
+        response = self.client.get("/news/", {"exclude": "id"})
+        self.assertEqual([item["is_saved"] for item in response.data["results"]],
+                         [news_id in saved_ids for news_id in ids])
+        self.assertNotIn("id", response.data["results"][0])
+
+    def test_is_saved_reflects_current_user(self):
+        self.create_news(4)
+        response = self.client.get("/news/")
+        saved_ids = set(SavedNews.objects.filter(user=self.user).values_list("news_id", flat=True))
+        for item in response.data["results"]:
+            self.assertEqual(item["is_saved"], item["id"] in saved_ids)
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        caches["shared"].clear()
+        self.user = Users.objects.create_user(username="reader", password="secret123")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        News.objects.bulk_create(
+            News(title=f"News {i}", slug=f"news-{i}", author=self.user, content="Content", is_published=True)
+            for i in range(7)
+        )
+        # Rows that share published_at are ordered by id alone.
+        moment = timezone.now()
+        News.objects.update(published_at=moment)
+        self.expected = list(News.objects.order_by("-id").values_list("id", flat=True))
+
+    def get_ids(self, response):
+        return [item["id"] for item in response.data["results"]]
+
+    def test_next_and_previous_walk_ties_without_gaps(self):
+        seen, url, params = [], "/news/", {"page_size": 3}
+        pages = []
+        while url:
+            response = self.client.get(url, params)
+            pages.append(response)
+            seen += self.get_ids(response)
+            url, params = response.data["next"], None
+        self.assertEqual(seen, self.expected)
+        self.assertIsNone(pages[0].data["previous"])
+        response = self.client.get(pages[-1].data["previous"])
+        self.assertEqual(self.get_ids(response), self.expected[3:6])
+        response = self.client.get(response.data["previous"])
+        self.assertEqual(self.get_ids(response), self.expected[:3])
+        self.assertIsNone(response.data["previous"])
+
+    def test_bad_cursors_are_not_found(self):
+        def encode(payload):
+            return urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+        cursors = ["not-base64!", encode([1]), encode({"p": ["garbage", 1]}),
+                   encode({"p": ["2024-01-01T00:00:00", "x"]}), encode({"p": [1, 2]}),
+                   encode({"p": ["2024-01-01T00:00:00", True]})]
+        for url in ("/news/", "/my-news/", "/comments/"):
+            for cursor in cursors:
+                response = self.client.get(url, {"cursor": cursor, "news_id": 1})
+                self.assertEqual(response.status_code, 404, (url, cursor))
+        response = self.client.get("/news/", {"cursor": encode({"p": ["2100-01-01T00:00:00", 1]})})
+        self.assertEqual(self.get_ids(response), self.expected)
+
+
+class ImageVariantTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.enterContext(override_settings(MEDIA_ROOT=self.media.name))
+        self.addCleanup(self.media.cleanup)
+        cache.clear()
+        caches["shared"].clear()
+        self.user = Users.objects.create_user(username="author", password="secret123")
+
+    @staticmethod
+    def upload(name, color=(200, 10, 10)):
+        buffer = io.BytesIO()
+        Image.new("RGB", (900, 600), color).save(buffer, "JPEG")
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/jpeg")
+
+    def test_variants_are_built_stored_and_shared(self):
+        news = NewsManager.create("Pictured", self.user, "Content", image=self.upload("a.jpg"), is_published=True)
+        self.assertEqual(News.objects.get(pk=news.pk).image_variants, {})
+        JobManager.run_pending()
+        variants = News.objects.get(pk=news.pk).image_variants
+        self.assertEqual(set(variants["sources"]), {"320", "640", "900"})
+        for formats in variants["sources"].values():
+            self.assertEqual(set(formats), {"webp", "jpeg"})
+            for name in formats.values():
+                self.assertTrue(default_storage.exists(name))
+        with default_storage.open(variants["sources"]["320"]["webp"]) as stored:
+            self.assertEqual(Image.open(stored).size, (320, 213))
+        self.assertTrue(variants["placeholder"].startswith("data:image/webp;base64,"))
+
+        # Reuse is found through the manifest in storage, not by scanning other news rows.
+        News.all_objects.filter(pk=news.pk).delete()
+        copy = NewsManager.create("Copy", self.user, "Content", image=self.upload("b.jpg"), is_published=True)
+        with mock.patch("news.manager.image.render_variants") as render:
+            JobManager.run_pending()
+        render.assert_not_called()
+        self.assertEqual(News.objects.get(pk=copy.pk).image_variants, variants)
+
+    def test_jobs_for_replaced_images_are_skipped(self):
+        news = NewsManager.create("Pictured", self.user, "Content", image=self.upload("a.jpg"))
+        News.objects.filter(pk=news.pk).update(image="news_images/other.jpg")
+        JobManager.run_pending()
+        self.assertEqual(News.objects.get(pk=news.pk).image_variants, {})
+        self.assertEqual(list(Job.objects.values_list("status", flat=True)), [Job.DONE])
+
+
+class NewsCacheTests(TestCase):
+    def setUp(self):
+        self.author = Users.objects.create_user(username="author", password="secret123")
+        self.reader = Users.objects.create_user(username="reader", password="secret123")
+        self.news = News.objects.create(title="Cached", author=self.author, content="Content", is_published=True)
+        cache.clear()
+        caches["shared"].clear()
+
+    def get(self, user, path):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.get(path)
+
+    def assert_cached_reads(self):
+        self.get(self.reader, "/news/")
+        with self.assertNumQueries(1):
+            response = self.get(self.reader, "/news/")
+        self.assertEqual(response.data["results"][0]["title"], "Cached")
+
+        self.get(self.reader, f"/news/{self.news.id}/")
+        with self.assertNumQueries(1):
+            self.get(self.reader, f"/news/{self.news.id}/")
+
+    def test_locmem_cache_serves_repeated_reads(self):
+        self.assert_cached_reads()
+
+    def test_file_cache_serves_repeated_reads(self):
+        with tempfile.TemporaryDirectory() as location:
+            with override_settings(CACHES={**settings.CACHES, "default": {
+                "BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": location,
+            }}):
+                self.assert_cached_reads()
+
+    def test_write_invalidates_cached_entries(self):
+        self.get(self.reader, "/news/")
+        self.get(self.reader, f"/news/{self.news.id}/")
+        client = APIClient()
+        client.force_authenticate(self.author)
+        with self.captureOnCommitCallbacks(execute=True):
+            client.put(f"/news/{self.news.id}/", {"title": "Updated"})
+        self.assertEqual(self.get(self.reader, "/news/").data["results"][0]["title"], "Updated")
+        self.assertEqual(self.get(self.reader, f"/news/{self.news.id}/").data["title"], "Updated")
+
+    def test_version_is_shared_between_processes(self):
+        version = NewsCache.get_version()
+        # Another process has its own local cache but sees the same shared version.
+        cache.clear()
+        self.assertEqual(NewsCache.get_version(), version)
+        self.get(self.reader, "/news/")
+        with self.captureOnCommitCallbacks(execute=True):
+            NewsManager.update(self.news, title="Updated")
+        self.assertEqual(caches["shared"].get(NewsCache.version_key), version + 1)
+        self.assertEqual(self.get(self.reader, "/news/").data["results"][0]["title"], "Updated")
+
+    def test_is_saved_is_merged_per_user(self):
+        SavedNews.objects.create(user=self.reader, news=self.news)
+        self.assertTrue(self.get(self.reader, "/news/").data["results"][0]["is_saved"])
+        self.assertFalse(self.get(self.author, "/news/").data["results"][0]["is_saved"])
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        caches["shared"].clear()
+        self.user = Users.objects.create_user(username="reader", password="secret123")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.news = News.objects.create(title="Conditional", author=self.user, content="Content", is_published=True)
+        self.detail = f"/news/{self.news.id}/"
+
+    def test_detail_etag_matches_the_body_served(self):
+        response = self.client.get(self.detail)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        self.assertEqual(self.client.get(self.detail, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        CommentManager.create(self.news, self.user, "New")
+        response = self.client.get(self.detail, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["comment_count"], 1)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(self.client.get(self.detail, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+
+        self.client.post("/saved-news/", {"news_id": self.news.id})
+        response = self.client.get(self.detail, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual((response.status_code, response.data["save_count"], response.data["is_saved"]),
+                         (200, 1, True))
+
+    def test_comments_etag_changes_when_comments_are_added_or_removed(self):
+        comment = CommentManager.create(self.news, self.user, "First")
+        params = {"news_id": self.news.id}
+        etag = self.client.get("/comments/", params)["ETag"]
+        self.assertEqual(self.client.get("/comments/", params, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        CommentManager.create(self.news, self.user, "Second")
+        response = self.client.get("/comments/", params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(len(response.data["results"]), 2)
+        CommentManager.delete(comment.id)
+        response = self.client.get("/comments/", params, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual([item["content"] for item in response.data["results"]], ["Second"])
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.user = Users.objects.create_user(username="reader", password="secret123")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.titled = News.objects.create(title="Python release", author=self.user, is_published=True,
+                                          content="<script>alert(1)</script> The new python is out.")
+        self.mentioned = News.objects.create(title="Weekly notes", author=self.user, is_published=True,
+                                             content="A short note about python and snakes.")
+        News.objects.create(title="Python draft", author=self.user, content="python", is_published=False)
+        NewsCache.bump_version()
+
+    def search(self, query):
+        return self.client.get("/news/search/", {"q": query})
+
+    def test_ranks_title_hits_first_and_escapes_headlines(self):
+        results = self.search("python").data["results"]
+        self.assertEqual([item["id"] for item in results], [self.titled.id, self.mentioned.id])
+        self.assertNotIn("<script>", results[0]["headline"])
+        self.assertIn("<mark>python</mark>", results[0]["headline"].lower())
+        self.assertEqual([item["id"] for item in self.search("python snakes").data["results"]], [self.mentioned.id])
+        self.assertEqual(self.search("  ").status_code, 400)
+
+    def test_search_vector_is_only_rebuilt_when_the_text_changes(self):
+        with mock.patch.object(News, "update_search_vector") as update:
+            news = News.objects.get(pk=self.titled.pk)
+            news.is_published = False
+            news.save()
+            News.objects.get(pk=self.titled.pk).save(update_fields=["title"])
+            update.assert_not_called()
+            news.title = "Python 4 release"
+            news.save()
+            news.save()
+            self.assertEqual(update.call_count, 1)
+            News.objects.create(title="Fresh", author=self.user, content="Content")
+            self.assertEqual(update.call_count, 2)
+
+    def test_native_headlines_are_escaped_before_marking(self):
+        headline = f'<img src=x onerror="alert(1)"> {HEADLINE_START_SEL}python{HEADLINE_STOP_SEL}'
+        self.assertEqual(render_headline(headline),
+                         "&lt;img src=x onerror=&quot;alert(1)&quot;&gt; <mark>python</mark>")
+
+
+class BulkEndpointTests(TestCase):
+    def setUp(self):
+        self.user = Users.objects.create_user(username="reader", password="secret123")
+        self.author = Users.objects.create_user(username="author", password="secret123")
+        self.news = [News.objects.create(title=f"Bulk news {i}", author=self.author, content="Content")
+                     for i in range(40)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def count_queries(self, method, path, data):
+        with CaptureQueriesContext(connection) as captured:
+            response = getattr(self.client, method)(path, data, format="json")
+        self.assertEqual(response.status_code, 200)
+        return len(captured), response.data["results"]
+
+    def test_bulk_save_and_unsave(self):
+        SavedNews.objects.create(user=self.user, news=self.news[0])
+        ids = [self.news[0].id, self.news[1].id, self.news[1].id, 999999]
+        _, results = self.count_queries("post", "/saved-news/bulk/", {"news_ids": ids})
+        self.assertEqual([item["status"] for item in results], ["already_saved", "saved", "not_found"])
+        JobManager.run_pending()
+        self.assertEqual(News.objects.get(pk=self.news[1].pk).save_count, 1)
+
+        _, results = self.count_queries("delete", "/saved-news/bulk/", {"news_ids": ids[:2]})
+        self.assertEqual([item["status"] for item in results], ["unsaved", "unsaved"])
+        self.assertFalse(SavedNews.objects.filter(user=self.user).exists())
+        JobManager.run_pending()
+        self.assertEqual(News.objects.get(pk=self.news[1].pk).save_count, 0)
+
+    def test_bulk_save_query_count_does_not_depend_on_batch_size(self):
+        small, _ = self.count_queries("post", "/saved-news/bulk/", {"news_ids": [n.id for n in self.news[:2]]})
+        large, _ = self.count_queries("post", "/saved-news/bulk/", {"news_ids": [n.id for n in self.news[2:]]})
+        self.assertEqual(small, large)
+        small, _ = self.count_queries("delete", "/saved-news/bulk/", {"news_ids": [n.id for n in self.news[:2]]})
+        large, _ = self.count_queries("delete", "/saved-news/bulk/", {"news_ids": [n.id for n in self.news[2:]]})
+        self.assertEqual(small, large)
+
+    def test_bulk_comments(self):
+        comments = [{"news_id": self.news[0].id, "content": "First"},
+                    {"news_id": self.news[0].id, "content": "  "},
+                    {"news_id": 999999, "content": "Missing"},
+                    {"news_id": self.news[1].id, "content": "Second"}]
+        small, _ = self.count_queries("post", "/comments/bulk/", {"comments": comments[:1]})
+        large, results = self.count_queries("post", "/comments/bulk/", {"comments": comments * 5})
+        self.assertEqual(small, large)
+        self.assertEqual([item["status"] for item in results[:4]], ["created", "error", "error", "created"])
+        self.assertEqual(results[0]["comment"]["content"], "First")
+        self.assertEqual(News.objects.get(pk=self.news[0].pk).comment_count, 6)
+        self.assertEqual(Comment.objects.filter(news=self.news[1]).count(), 5)
+
+    def test_bulk_rejects_empty_batches(self):
+        response = self.client.post("/saved-news/bulk/", {"news_ids": []}, format="json")
+        self.assertEqual(response.status_code, 400)
+
+
+class CounterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        caches["shared"].clear()
+        self.user = Users.objects.create_user(username="reader", password="secret123")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.news = News.objects.create(title="Counted", author=self.user, content="Content", is_published=True)
+
+    def counts(self):
+        self.news.refresh_from_db()
+        return self.news.comment_count, self.news.save_count
+
+    def test_counters_follow_comments_and_saves(self):
+        for content in ("First", "Second"):
+            self.client.post("/comments/", {"news": self.news.id, "user_id": str(self.user.id), "content": content})
+        self.client.post("/saved-news/", {"news_id": self.news.id})
+        self.assertEqual(self.counts(), (2, 1))
+
+        comment = Comment.objects.filter(news=self.news).first()
+        self.assertEqual(self.client.delete("/comments/", {"comment_id": comment.id}).status_code, 204)
+        self.client.delete("/saved-news/", {"news_id": self.news.id})
+        self.assertEqual(self.client.delete("/saved-news/", {"news_id": self.news.id}).status_code, 404)
+        self.assertEqual(self.counts(), (1, 0))
+
+    def test_losing_a_concurrent_delete_leaves_counters_alone(self):
+        comment = CommentManager.create(self.news, self.user, "Only")
+        SavedNews.objects.create(user=self.user, news=self.news)
+        News.objects.filter(pk=self.news.pk).update(save_count=1)
+        # The other request already removed the row this one looked up.
+        Comment.objects.filter(pk=comment.pk).delete()
+        with mock.patch("news.manager.comment.get_object_or_404", return_value=comment):
+            CommentManager.delete(comment.id)
+        self.assertEqual(self.counts(), (1, 1))
+
+    def test_recount_fixes_drifted_counters(self):
+        CommentManager.create(self.news, self.user, "Only")
+        News.objects.filter(pk=self.news.pk).update(comment_count=7, save_count=3)
+        out = io.StringIO()
+        call_command("recount_news_counters", stdout=out)
+        self.assertIn("Fixed counters on 1 news.", out.getvalue())
+        self.assertEqual(self.counts(), (1, 0))
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.user = Users.objects.create_user(username="reader", password="secret123")
+        self.author = Users.objects.create_user(username="author", password="secret123")
+        self.published = [News.objects.create(title=f"Export {i}", author=self.author, content="Content",
+                                              is_published=True) for i in range(5)]
+        self.draft = News.objects.create(title="Draft", author=self.author, content="Content")
+        self.own_draft = News.objects.create(title="Own draft", author=self.user, content="Content")
+        SavedNews.objects.create(user=self.user, news=self.published[0])
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def export(self, path, params=None):
+        response = self.client.get(path, params or {})
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        return [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+
+    def test_news_export_streams_visible_rows_in_id_order(self):
+        with override_settings(EXPORT_CHUNK_SIZE=2):
+            rows = self.export("/export/news/")
+        self.assertEqual([row["id"] for row in rows], [news.id for news in self.published] + [self.own_draft.id])
+        self.assertEqual([row["is_saved"] for row in rows], [True, False, False, False, False, False])
+
+    def test_news_export_filters_and_resumes(self):
+        rows = self.export("/export/news/", {"author": "author", "is_published": "true",
+                                             "after": self.published[1].id})
+        self.assertEqual([row["id"] for row in rows], [news.id for news in self.published[2:]])
+        self.assertEqual(self.export("/export/news/", {"until": "2000-01-01"}), [])
+        self.assertEqual(self.client.get("/export/news/", {"since": "yesterday"}).status_code, 400)
+
+    @override_settings(EXPORT_CHUNK_SIZE=2)
+    async def test_exports_stream_chunk_by_chunk_under_asgi(self):
+        token = await sync_to_async(AuthManager.generate_token)(self.user)
+        response = await AsyncClient().get("/export/news/", headers={"Authorization": f"Bearer {token}"})
+        self.assertTrue(response.is_async)
+        chunks = [chunk async for chunk in response.streaming_content]
+        self.assertEqual(len(chunks), 3)
+        rows = [json.loads(line) for line in b"".join(chunks).decode().splitlines()]
+        self.assertEqual([row["id"] for row in rows], [news.id for news in self.published] + [self.own_draft.id])
+
+    def test_comment_and_saved_news_exports(self):
+        CommentManager.create(self.published[0], self.user, "First")
+        CommentManager.create(self.published[1], self.user, "Second")
+        rows = self.export("/export/comments/", {"news_id": self.published[1].id})
+        self.assertEqual([row["content"] for row in rows], ["Second"])
+        CommentManager.create(self.draft, self.author, "Hidden draft")
+        CommentManager.create(self.published[2], self.author, "Hidden deleted")
+        NewsManager.delete(self.published[2].id)
+        rows = self.export("/export/comments/")
+        self.assertEqual([row["content"] for row in rows], ["First", "Second"])
+        self.assertEqual(self.client.get("/export/comments/", {"news_id": "abc"}).status_code, 400)
+        rows = self.export("/export/saved-news/")
+        self.assertEqual([row["news_id"] for row in rows], [self.published[0].id])
+
+
+class FastReadPathTests(TestCase):
+    def setUp(self):
+        self.author = Users.objects.create_user(username="autor", password="secret123")
+        self.news = News.objects.create(title="Știri\u2028de azi", author=self.author, is_published=True,
+                                        content="Conținut </script> \u2029 \"citat\" " * 30,
+                                        image="news_images/2025/01/photo.jpg")
+        News.objects.filter(pk=self.news.pk).update(image_variants={
+            "hash": "ab", "placeholder": "data:image/webp;base64,AA==",
+            "sources": {"320": {"webp": "news_images/variants/ab/320.webp"}},
+        })
+        News.objects.create(title="Fără imagine", author=self.author, content="Scurt")
+        CommentManager.create(self.news, self.author, "Comentariu \u2028 cu emoji 🎉")
+        self.request = APIRequestFactory().get("/news/")
+
+    def assert_same_bytes(self, serialized, fast):
+        self.assertEqual(ORJSONRenderer().render(fast), JSONRenderer().render(serialized))
+
+    def test_news_rows_match_serializer_output(self):
+        queryset = News.objects.select_related("author").order_by("id")
+        context = {"request": self.request, "saved_ids": {self.news.id}}
+        for fields in (NewsSerializer.select_fields({}), NewsSerializer.compact_fields, ["title", "is_saved"]):
+            self.assert_same_bytes(
+                NewsSerializer(queryset, many=True, fields=fields, context=context).data,
+                NewsReader.render(NewsReader.values(queryset, fields), fields, context),
+            )
+
+    def test_comment_rows_match_serializer_output(self):
+        queryset = Comment.objects.select_related("user").order_by("id")
+        self.assert_same_bytes(
+            CommentSerializer(queryset, many=True).data,
+            CommentReader.render(CommentReader.values(queryset, CommentReader.fields), CommentReader.fields),
+        )
+
+    def test_renderer_matches_json_renderer(self):
+        data = {"decimal": Decimal("1.10"), "uuid": self.author.id, "when": self.news.published_at,
+                "day": self.news.published_at.date(), "lazy": gettext_lazy("News"), 1: [1.5, None, True],
+                "text": "a\u2028b\u2029c ü"}
+        self.assert_same_bytes(data, data)
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        caches["shared"].clear()
+        self.user = Users.objects.create_user(username="reader", password="secret123")
+        self.news = [News.objects.create(title=f"News {i}", author=self.user, content="Content", is_published=True)
+                     for i in range(3)]
+        Comment.objects.create(news=self.news[0], user=self.user, content="First")
+        SavedNews.objects.create(user=self.user, news=self.news[1])
+        self.headers = {"Authorization": f"Bearer {AuthManager.generate_token(self.user)}"}
+
+    async def get(self, path, params=None):
+        return await AsyncClient().get(path, params, headers=self.headers)
+
+    async def test_lists_page_like_the_sync_views(self):
+        response = await self.get("/async/news/", {"page_size": 2})
+        page = response.json()
+        self.assertEqual([item["id"] for item in page["results"]], [self.news[2].id, self.news[1].id])
+        self.assertEqual([item["is_saved"] for item in page["results"]], [False, True])
+        page = (await self.get(page["next"])).json()
+        self.assertEqual([item["id"] for item in page["results"]], [self.news[0].id])
+
+        response = await self.get("/async/comments/", {"news_id": self.news[0].id})
+        self.assertEqual([item["content"] for item in response.json()["results"]], ["First"])
+        response = await self.get("/async/saved-news/")
+        self.assertEqual([item["news_id"] for item in response.json()], [self.news[1].id])
+        response = await self.get(f"/async/news/{self.news[0].id}/")
+        self.assertEqual(response.json()["title"], "News 0")
+
+    async def test_errors_are_client_errors(self):
+        self.assertEqual((await self.get("/async/news/", {"cursor": "garbage"})).status_code, 404)
+        response = await self.get("/async/comments/", {"news_id": self.news[0].id, "cursor": "garbage"})
+        self.assertEqual(response.json(), {"detail": "Invalid cursor"})
+        self.assertEqual((await self.get("/async/comments/")).status_code, 400)
+        self.assertEqual((await self.get("/async/news/0/")).status_code, 404)
+        self.assertEqual((await AsyncClient().get("/async/news/")).status_code, 401)
+
+
+class BenchmarkCommandTests(TestCase):
+    def test_seed_and_benchmark_run_against_the_test_database(self):
+        out = io.StringIO()
+        call_command("seed_benchmark_data", users=10, news=40, comments=12, saved=4, stdout=out)
+        self.assertEqual(Users.objects.filter(username__startswith="bench_").count(), 10)
+        self.assertEqual(News.objects.filter(slug__startswith="bench-").count(), 40)
+        self.assertEqual(Comment.objects.count(), 12)
+
+        cache.set("unrelated", 1)
+        with tempfile.TemporaryDirectory() as directory:
+            output = f"{directory}/results.json"
+            call_command("benchmark_endpoints", iterations=1, warmup=0, output=output, stdout=out, stderr=out)
+            with open(output) as f:
+                results = json.load(f)["results"]
+        self.assertIn("GET news-list-create", results)
+        failed = {key: stats["statuses"] for key, stats in results.items()
+                  if any(code.startswith("5") for code in stats["statuses"])}
+        self.assertEqual(failed, {})
+        self.assertEqual(cache.get("unrelated"), 1)
+
+
+class ImportNewsTests(TestCase):
+    def setUp(self):
+        self.author = Users.objects.create_user(username="author", password="secret123")
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def run_import(self, name, content, **options):
+        path = f"{self.directory.name}/{name}"
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        out, err = io.StringIO(), io.StringIO()
+        call_command("import_news", path, author="author", stdout=out, stderr=err, **options)
+        return err.getvalue()
+
+    def test_jsonl_dedupes_slugs_across_batches(self):
+        News.objects.create(title="Same", slug="same", author=self.author, content="Content")
+        News.objects.create(title="Same", slug="same-7", author=self.author, content="Content")
+        News.objects.create(title="Same 9", slug="same-9", author=self.author, content="Content")
+        News.objects.create(title="Same story", slug="same-story", author=self.author, content="Content")
+        same = {"title": "Same", "content": "Content"}
+        rows = [same] * 5 + [{"title": "Same 15", "content": "Content"}, same]
+        lines = "\n".join(json.dumps(row) for row in rows)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.run_import("news.jsonl", lines, batch_size=2)
+
+        slugs = set(News.objects.values_list("slug", flat=True))
+        self.assertEqual(slugs, {"same", "same-7", "same-9", "same-story", *(f"same-{n}" for n in range(10, 17))})
+        self.assertLess(len(queries), 40)
+
+    def test_csv_keeps_archive_timestamps(self):
+        content = ("title,content,author,is_published,published_at,updated_at\n"
+                   "Old story,Content,author,true,2020-01-02T03:04:05+00:00,2020-02-03T04:05:06+00:00\n")
+        self.run_import("news.csv", content)
+
+        news = News.objects.get(slug="old-story")
+        self.assertTrue(news.is_published)
+        self.assertEqual(news.published_at.isoformat(), "2020-01-02T03:04:05+00:00")
+        self.assertEqual(news.updated_at.isoformat(), "2020-02-03T04:05:06+00:00")
+        fresh = News.objects.create(title="Fresh", author=self.author, content="Content")
+        self.assertGreater(fresh.published_at, news.updated_at)
+
+    def test_invalid_rows_are_skipped(self):
+        lines = "\n".join([
+            "{not json",
+            json.dumps({"title": "", "content": "Content"}),
+            json.dumps({"title": "Orphan", "content": "Content", "author": "nobody"}),
+            json.dumps({"title": "Kept", "content": "Content"}),
+        ])
+        errors = self.run_import("news.jsonl", lines)
+
+        self.assertEqual(list(News.objects.values_list("slug", flat=True)), ["kept"])
+        self.assertIn("Line 1: skipped, invalid JSON", errors)
+        self.assertIn("Line 2: skipped, title and content are required", errors)
+        self.assertIn("Line 3: skipped, unknown author 'nobody'", errors)
+
+
+class AsyncBenchmarkCommandTests(TransactionTestCase):
+    def test_no_cache_run_compares_both_paths(self):
+        user = Users.objects.create_user(username="reader", password="secret123")
+        News.objects.create(title="Benchmarked", author=user, content="Content", is_published=True)
+        out = io.StringIO()
+        call_command("benchmark_async_reads", requests=2, concurrency=1, no_cache=True, stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 4)
+
+    def test_cached_run_leaves_the_site_cache_alone(self):
+        user = Users.objects.create_user(username="reader", password="secret123")
+        News.objects.create(title="Benchmarked", author=user, content="Content", is_published=True)
+        cache.set("unrelated", 1)
+        out = io.StringIO()
+        call_command("benchmark_async_reads", requests=2, concurrency=1, stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 4)
+        self.assertEqual(cache.get("unrelated"), 1)
+
+
+class QueryInstrumentationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        caches["shared"].clear()
+        self.user = Users.objects.create_user(username="reader", password="secret123")
+        News.objects.create(title="Sampled", author=self.user, content="Content", is_published=True)
+
+    def get_news(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        return client.get("/news/")
+
+    def test_sampling_is_off_by_default(self):
+        with self.assertNoLogs("config.sql"):
+            self.assertNotIn("Server-Timing", self.get_news())
+
+    @override_settings(SQL_SAMPLE_RATE=1.0, SQL_REPEAT_THRESHOLD=1)
+    def test_sampled_requests_are_timed_and_logged(self):
+        with self.assertLogs("config.sql", "INFO") as logs:
+            response = self.get_news()
+        self.assertRegex(response["Server-Timing"], r'^db;dur=[\d.]+;desc="2 queries", total;dur=[\d.]+$')
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual((line["view"], line["status"], line["queries"]), ("news-list-create", 200, 2))
+
+        recorder = middleware.QueryRecorder()
+        recorder.statements.update({"SELECT 1 WHERE id IN (%s, %s)": 1, "SELECT 1 WHERE id IN (%s, %s, %s)": 2})
+        self.assertEqual(recorder.repeated_shapes(), [("SELECT 1 WHERE id IN (%s...)", 3)])
+
+
+class CompressionTests(TestCase):
+    def setUp(self):
+        self.user = Users.objects.create_user(username="reader", password="secret123")
+        News.objects.bulk_create(
+            News(title=f"News {i}", slug=f"news-{i}", author=self.user, content="Content", excerpt="Content " * 20,
+                 is_published=True)
+            for i in range(20)
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        cache.clear()
+        caches["shared"].clear()
+
+    def test_feed_is_gzipped_once_per_body(self):
+        plain = self.client.get("/news/")
+        with mock.patch("config.middleware.compress", wraps=middleware.compress) as compress:
+            first = self.client.get("/news/", HTTP_ACCEPT_ENCODING="gzip")
+            second = self.client.get("/news/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(compress.call_count, 1)
+        self.assertEqual(first["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", first["Vary"])
+        self.assertEqual(gzip.decompress(first.content), plain.content)
+        self.assertEqual(second.content, first.content)
+
+    def test_small_bodies_and_unsupported_encodings_are_not_compressed(self):
+        response = self.client.get("/news/", {"fields": "id", "page_size": 1}, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertFalse(response.has_header("Content-Encoding"))
+        response = self.client.get("/news/", HTTP_ACCEPT_ENCODING="identity")
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    def test_negotiate_encoding(self):
+        preferred = "br" if middleware.brotli else "gzip"
+        self.assertEqual(middleware.negotiate_encoding("gzip, deflate, br"), preferred)
+        self.assertEqual(middleware.negotiate_encoding("br;q=0, gzip;q=0.5"), "gzip")
+        self.assertEqual(middleware.negotiate_encoding("*"), preferred)
+        self.assertIsNone(middleware.negotiate_encoding("gzip;q=0, identity"))
+        self.assertIsNone(middleware.negotiate_encoding(""))
+
+
+# A second database that is not a test mirror of the primary, so it can lag behind it.
+REPLICA_ALIAS = next((alias for alias, database in settings.DATABASES.items()
+                      if alias != "default" and not database.get("TEST", {}).get("MIRROR")), None)
+
+
+@skipUnless(REPLICA_ALIAS, "needs a second database alias that is not a test mirror of the primary")
+@override_settings(DATABASE_REPLICAS=[REPLICA_ALIAS])
+class ReplicaRoutingTests(TransactionTestCase):
+    databases = {"default", REPLICA_ALIAS} - {None}
+
+    def setUp(self):
+        cache.clear()
+        caches["shared"].clear()
+        self.user = Users.objects.create_user(username="reader", password="secret123")
+        self.news = News.objects.create(title="Replicated", author=self.user, content="Content", is_published=True)
+        # The replica holds the same rows as the primary, minus anything written afterwards.
+        self.user.save(using=REPLICA_ALIAS)
+        self.news.save(using=REPLICA_ALIAS)
+        Comment.objects.create(news=self.news, user=self.user, content="Not replicated yet")
+
+    def client_at(self, address):
+        client = APIClient(REMOTE_ADDR=address)
+        client.force_authenticate(self.user)
+        return client
+
+    def comment_count(self, client):
+        return len(client.get("/comments/", {"news_id": self.news.id}).data["results"])
+
+    def test_reads_use_replica_until_the_client_writes(self):
+        client, other = self.client_at("10.0.0.1"), self.client_at("10.0.0.2")
+        self.assertEqual(self.comment_count(client), 0)
+
+        response = client.post("/comments/", {"news": self.news.id, "user_id": str(self.user.id), "content": "Mine"})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.comment_count(client), 2)
+        self.assertEqual(self.comment_count(other), 0)
+
+        caches["shared"].clear()
+        self.assertEqual(self.comment_count(client), 0)
+
+    def test_cache_fills_read_from_the_primary(self):
+        fresh = News.objects.create(title="Not replicated yet", author=self.user, content="Content",
+                                    is_published=True)
+        News.objects.filter(pk=self.news.pk).update(title="Edited")
+        NewsCache.bump_version()
+        client = self.client_at("10.0.0.1")
+        results = client.get("/news/").data["results"]
+        self.assertEqual([(item["id"], item["title"]) for item in results],
+                         [(fresh.id, "Not replicated yet"), (self.news.id, "Edited")])
+        self.assertEqual(client.get(f"/news/{self.news.id}/").data["title"], "Edited")
+
+    def test_reads_outside_requests_and_transactions_use_primary(self):
+        router = PrimaryReplicaRouter()
+        self.assertEqual(router.db_for_read(News), "default")
+        with RoutingState().active():
+            self.assertEqual(router.db_for_read(News), REPLICA_ALIAS)
+            self.assertEqual(router.db_for_read(Users), "default")
+            with transaction.atomic():
+                self.assertEqual(router.db_for_read(News), "default")
+            self.assertEqual(router.db_for_write(News), "default")
+            self.assertEqual(router.db_for_read(News), "default")
+
+
+class TrendingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        caches["shared"].clear()
+        self.user = Users.objects.create_user(username="reader", password="secret123")
+        self.news = [News.objects.create(title=f"Trending {i}", author=self.user, content="Content",
+                                         is_published=True) for i in range(3)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_events_update_scores_and_match_a_rebuild(self):
+        CommentManager.create(self.news[0], self.user, "One")
+        self.client.post("/comments/bulk/", {"comments": [{"news_id": self.news[1].id, "content": "Two"}] * 3},
+                         format="json")
+        self.client.post("/saved-news/", {"news_id": self.news[1].id}, format="json")
+        JobManager.run_pending()
+        incremental = dict(TrendingScore.objects.values_list("news_id", "score"))
+
+        call_command("rebuild_trending", stdout=io.StringIO())
+        rebuilt = dict(TrendingScore.objects.values_list("news_id", "score"))
+        self.assertEqual(set(incremental), {self.news[0].id, self.news[1].id})
+        for news_id, score in rebuilt.items():
+            self.assertAlmostEqual(incremental[news_id], score, places=3)
+        self.assertAlmostEqual(rebuilt[self.news[1].id] - rebuilt[self.news[0].id], math.log2(5), places=3)
+
+    def test_first_event_sets_the_score_and_later_ones_add_to_it(self):
+        now = timezone.now()
+        exponent = TrendingManager.get_exponent(now)
+        TrendingManager.record({self.news[0].id: 3}, now)
+        self.assertAlmostEqual(TrendingScore.objects.get(pk=self.news[0].id).score, math.log2(3) + exponent)
+        TrendingManager.record({self.news[0].id: 5}, now)
+        self.assertAlmostEqual(TrendingScore.objects.get(pk=self.news[0].id).score, math.log2(8) + exponent)
+
+    def test_recent_events_outweigh_older_ones(self):
+        now = timezone.now()
+        TrendingManager.record({self.news[0].id: 3}, now - timedelta(hours=settings.TRENDING_HALF_LIFE_HOURS * 2))
+        TrendingManager.record({self.news[1].id: 1}, now)
+        TrendingManager.record({self.news[2].id: 1}, now - timedelta(hours=1))
+        response = self.client.get("/news/trending/", {"page_size": 2})
+        self.assertEqual([item["id"] for item in response.data["results"]], [self.news[1].id, self.news[2].id])
+        response = self.client.get(response.data["next"])
+        self.assertEqual([item["id"] for item in response.data["results"]], [self.news[0].id])
+
+
+@override_settings(TIMELINE_PUSH_MAX_FOLLOWERS=2, TIMELINE_PROLIFIC_DAILY_POSTS=100)
+class TimelineTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        caches["shared"].clear()
+        self.user = Users.objects.create_user(username="reader", password="secret123")
+        self.writer = Users.objects.create_user(username="writer", password="secret123")
+        self.celebrity = Users.objects.create_user(username="celebrity", password="secret123")
+        self.fan = Users.objects.create_user(username="fan", password="secret123")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def publish(self, author, title):
+        news = NewsManager.create(title, author, "Content", is_published=True)
+        JobManager.run_pending()
+        return news
+
+    def test_pushed_and_pulled_news_are_merged_newest_first(self):
+        self.assertEqual(self.client.post(f"/authors/{self.writer.id}/follow/").status_code, 201)
+        self.assertEqual(self.client.post(f"/authors/{self.writer.id}/follow/").status_code, 200)
+        self.client.post(f"/authors/{self.celebrity.id}/follow/")
+        TimelineManager.follow(self.fan, self.celebrity.id)
+        published = [self.publish(author, f"Post {i}")
+                     for i, author in enumerate([self.writer, self.celebrity, self.writer, self.celebrity])]
+
+        self.celebrity.refresh_from_db()
+        self.assertTrue(self.celebrity.timeline_pull)
+        self.assertEqual(set(TimelineEntry.objects.filter(user=self.user).values_list("news_id", flat=True)),
+                         {published[0].id, published[2].id})
+        expected = [news.id for news in reversed(published)]
+        response = self.client.get("/timeline/", {"page_size": 3})
+        self.assertEqual([item["id"] for item in response.data["results"]], expected[:3])
+        response = self.client.get(response.data["next"])
+        self.assertEqual([item["id"] for item in response.data["results"]], expected[3:])
+        self.assertIsNone(response.data["next"])
+
+    def test_unpublish_and_unfollow_remove_entries(self):
+        self.assertEqual(self.client.post(f"/authors/{self.user.id}/follow/").status_code, 400)
+        self.client.post(f"/authors/{self.writer.id}/follow/")
+        first, second = self.publish(self.writer, "First"), self.publish(self.writer, "Second")
+        NewsManager.update(second, is_published=False)
+        JobManager.run_pending()
+        response = self.client.get("/timeline/")
+        self.assertEqual([item["id"] for item in response.data["results"]], [first.id])
+
+        self.assertEqual(self.client.delete(f"/authors/{self.writer.id}/follow/").status_code, 204)
+        self.assertEqual(self.client.delete(f"/authors/{self.writer.id}/follow/").status_code, 404)
+        self.assertFalse(TimelineEntry.objects.filter(user=self.user).exists())
+        self.writer.refresh_from_db()
+        self.assertEqual(self.writer.follower_count, 0)
+
+    def test_trim_keeps_the_newest_entries(self):
+        news = [self.publish(self.writer, f"Post {i}") for i in range(4)]
+        TimelineManager.follow(self.user, self.writer.id)
+        call_command("trim_timelines", max_entries=2, stdout=io.StringIO())
+        self.assertEqual(set(TimelineEntry.objects.filter(user=self.user).values_list("news_id", flat=True)),
+                         {news[2].id, news[3].id})
+
+
+@override_settings(THROTTLE_STORE="config.throttling.MemoryStore",
+                   THROTTLE_RULES={"login": {"ip": "3/min"}, "comment-list-create": {"user": "2/min"}})
+class ThrottleTests(TestCase):
+    def setUp(self):
+        self.user = Users.objects.create_user(username="reader", password="secret123")
+        self.news = News.objects.create(title="Throttled", author=self.user, content="Content", is_published=True)
+
+    def test_login_is_rejected_before_hashing(self):
+        client = APIClient()
+        credentials = {"username": "reader", "password": "wrong-password"}
+        for _ in range(3):
+            self.assertEqual(client.post("/login/", credentials, format="json").status_code, 400)
+        with mock.patch("django.contrib.auth.base_user.check_password") as check_password:
+            response = client.post("/login/", credentials, format="json")
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response["Retry-After"]), 0)
+        check_password.assert_not_called()
+        other = APIClient(REMOTE_ADDR="10.0.0.2")
+        self.assertEqual(other.post("/login/", credentials, format="json").status_code, 400)
+
+    def test_comments_are_limited_per_user_without_queries(self):
+        other = Users.objects.create_user(username="other", password="secret123")
+        clients = []
+        for user in (self.user, other):
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f"Bearer {AuthManager.generate_token(user)}")
+            clients.append(client)
+        comments = [{"news": self.news.id, "user_id": str(user.id), "content": "Spam"} for user in (self.user, other)]
+        for _ in range(2):
+            self.assertEqual(clients[0].post("/comments/", comments[0], format="json").status_code, 201)
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(clients[0].post("/comments/", comments[0], format="json").status_code, 429)
+        self.assertEqual(len(captured), 0)
+        self.assertEqual(clients[0].get(f"/comments/?news_id={self.news.id}").status_code, 200)
+        self.assertEqual(clients[1].post("/comments/", comments[1], format="json").status_code, 201)
+
+    def test_previous_window_is_weighted_by_its_overlap(self):
+        limiter, rate = SlidingWindowLimiter(MemoryStore()), parse_rate("10/min")
+        for _ in range(10):
+            self.assertEqual(limiter.hit("key", rate, now=30), 0)
+        # Half of the previous window still counts: 5 of its 10 hits leave room for 5 more.
+        for _ in range(5):
+            self.assertEqual(limiter.hit("key", rate, now=90), 0)
+        self.assertEqual(limiter.hit("key", rate, now=90), 6)
+        self.assertEqual(limiter.hit("key", rate, now=120), 0)
+
+    @override_settings(THROTTLE_TRUSTED_PROXIES=["10.0.0.1", "192.168.0.0/16"])
+    def test_client_ip_is_read_through_trusted_proxies_only(self):
+        factory = APIRequestFactory()
+        forwarded = "1.1.1.1, 2.2.2.2, 192.168.1.5"
+        request = factory.post("/login/", HTTP_X_FORWARDED_FOR=forwarded, REMOTE_ADDR="10.0.0.1")
+        self.assertEqual(get_client_ip(request), "2.2.2.2")
+        request = factory.post("/login/", HTTP_X_FORWARDED_FOR=forwarded, REMOTE_ADDR="3.3.3.3")
+        self.assertEqual(get_client_ip(request), "3.3.3.3")
+        request = factory.post("/login/", HTTP_X_FORWARDED_FOR="192.168.1.5", REMOTE_ADDR="10.0.0.1")
+        self.assertEqual(get_client_ip(request), "192.168.1.5")
+        self.assertEqual(get_client_ip(factory.post("/login/", REMOTE_ADDR="10.0.0.1")), "10.0.0.1")
+
+    def test_cache_store_counts_in_the_shared_cache(self):
+        caches["shared"].clear()
+        store = CacheStore()
+        self.assertEqual([store.incr("key", timeout=60) for _ in range(2)], [1, 2])
+        self.assertEqual(caches["shared"].get("key"), 2)
+
+
+class EventStreamTests(TestCase):
+    def setUp(self):
+        self.user = Users.objects.create_user(username="reader", password="secret123")
+        self.news = News.objects.create(title="Live", author=self.user, content="Content", is_published=True)
+        self.token = AuthManager.generate_token(self.user)
+        self.app = EventStreamApp(mock.AsyncMock())
+
+    async def open_stream(self, path, query_string=b"", method="GET"):
+        requests, sent = asyncio.Queue(), asyncio.Queue()
+        scope = {"type": "http", "method": method, "path": path, "query_string": query_string, "headers": []}
+        task = asyncio.ensure_future(self.app(scope, requests.get, sent.put))
+        return task, requests, sent
+
+    async def next_body(self, sent):
+        while True:
+            message = await asyncio.wait_for(sent.get(), timeout=2)
+            if message["type"] == "http.response.body":
+                return message["body"]
+
+    def publish(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            comment = CommentManager.create(self.news, self.user, "Hello")
+            NewsManager.create("Fresh", self.user, "Content", is_published=True)
+        return comment
+
+    async def test_new_comments_and_news_are_pushed(self):
+        comments, comment_requests, comment_sent = await self.open_stream(
+            f"/events/comments/{self.news.id}/", f"token={self.token}".encode())
+        feed, feed_requests, feed_sent = await self.open_stream("/events/news/", f"token={self.token}".encode())
+        self.assertEqual((await comment_sent.get())["status"], 200)
+        self.assertTrue((await self.next_body(comment_sent)).startswith(b"retry:"))
+        self.assertTrue((await self.next_body(feed_sent)).startswith(b"retry:"))
+
+        comment = await sync_to_async(self.publish)()
+        event, data = (await self.next_body(comment_sent)).split(b"\n")[:2]
+        self.assertEqual(event, b"event: comment")
+        self.assertEqual(json.loads(data[len(b"data: "):])["id"], comment.id)
+        event, data = (await self.next_body(feed_sent)).split(b"\n")[:2]
+        self.assertEqual(event, b"event: news")
+        self.assertEqual(json.loads(data[len(b"data: "):])["title"], "Fresh")
+
+        for requests, task in ((comment_requests, comments), (feed_requests, feed)):
+            await requests.put({"type": "http.disconnect"})
+            await asyncio.wait_for(task, timeout=2)
+        self.assertEqual(get_hub().subscriptions, {})
+
+    async def test_streams_require_a_token_and_other_paths_reach_django(self):
+        task, _, sent = await self.open_stream("/events/news/")
+        await task
+        self.assertEqual((await sent.get())["status"], 401)
+        task, _, sent = await self.open_stream("/events/news/", method="POST")
+        await task
+        self.assertEqual((await sent.get())["status"], 405)
+        await self.open_stream("/news/")
+        await asyncio.sleep(0)
+        self.app.application.assert_awaited_once()
+
+
+class NewsPurgeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        caches["shared"].clear()
+        self.user = Users.objects.create_user(username="reader", password="secret123")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.news = NewsManager.create("Viral", self.user, "Content", is_published=True)
+        self.other = NewsManager.create("Other", self.user, "Content", is_published=True)
+        for news in (self.news, self.other):
+            Comment.objects.bulk_create(Comment(news=news, user=self.user, content=f"#{i}") for i in range(5))
+            SavedNews.objects.create(user=self.user, news=news)
+            TrendingScore.objects.create(news=news, score=1)
+        JobManager.run_pending()
+
+    def test_delete_hides_news_before_it_is_purged(self):
+        self.assertEqual(self.client.delete(f"/news/{self.news.id}/").status_code, 204)
+        self.assertEqual(self.client.get(f"/news/{self.news.id}/").status_code, 404)
+        self.assertEqual([item["id"] for item in self.client.get("/news/").data["results"]], [self.other.id])
+        self.assertEqual([item["news_id"] for item in self.client.get("/saved-news/").data],
+                         [self.other.id])
+        self.assertTrue(News.all_objects.filter(pk=self.news.pk).exists())
+        self.assertEqual(Comment.objects.filter(news_id=self.news.id).count(), 5)
+
+    def test_delete_retracts_the_news_from_other_reads(self):
+        follower = Users.objects.create_user(username="follower", password="secret123")
+        TimelineEntry.objects.create(user=follower, news=self.other, published_at=self.other.published_at)
+        TimelineEntry.objects.create(user=follower, news=self.news, published_at=self.other.published_at + timedelta(1))
+        NewsManager.delete(news_id=self.news.id)
+
+        self.assertEqual(list(CommentManager.get_by_news(self.news.id)), [])
+        self.assertEqual(CommentManager.get_metadata(self.news.id)["count"], 0)
+        self.assertEqual(self.client.get("/comments/", {"news_id": self.news.id}).data["results"], [])
+        self.assertFalse(TrendingScore.objects.filter(news_id=self.news.id).exists())
+        # Timeline entries are left to the purge, but a one-item page must still be filled.
+        self.client.force_authenticate(follower)
+        page = self.client.get("/timeline/", {"page_size": 1}).data
+        self.assertEqual([item["id"] for item in page["results"]], [self.other.id])
+        self.assertIsNone(page["next"])
+        self.assertTrue(TimelineEntry.objects.filter(news_id=self.news.id).exists())
+        JobManager.run_pending()
+        self.assertFalse(TimelineEntry.objects.filter(news_id=self.news.id).exists())
+        self.client.force_authenticate(self.user)
+        self.assertEqual(NewsManager.create("Viral", self.user, "Content").slug, "viral")
+
+    @override_settings(NEWS_PURGE_BATCH_SIZE=2)
+    def test_purge_removes_dependent_rows_in_batches(self):
+        NewsManager.delete(news_id=self.news.id)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(JobManager.run_pending(), 4)
+        batches = [query["sql"] for query in queries
+                   if query["sql"].startswith('DELETE FROM "news_comment"') and "LIMIT" in query["sql"]]
+        self.assertEqual(len(batches), 4)
+        self.assertFalse(News.all_objects.filter(pk=self.news.pk).exists())
+        for model in (Comment, SavedNews, TrendingScore):
+            self.assertFalse(model.objects.filter(news_id=self.news.id).exists())
+        self.assertEqual(Comment.objects.filter(news=self.other).count(), 5)
+        self.assertTrue(SavedNews.objects.filter(news=self.other).exists())
@@ -1,10 +1,27 @@
 from django.urls import path
-from .views import NewsListCreateView, MyNewsListView, NewsDetailView, CommentListCreateView, SavedNewsView
+
+from . import async_views
+from .views import (NewsListCreateView, MyNewsListView, NewsDetailView, NewsSearchView, CommentListCreateView,
+                    CommentBulkCreateView, SavedNewsView, SavedNewsBulkView, NewsExportView, CommentExportView,
+                    SavedNewsExportView, TrendingNewsView, TimelineView, FollowView)
 
 urlpatterns = [
     path("news/", NewsListCreateView.as_view(), name="news-list-create"),
     path("my-news/", MyNewsListView.as_view(), name="my-news"),
+    path("news/search/", NewsSearchView.as_view(), name="news-search"),
+    path("news/trending/", TrendingNewsView.as_view(), name="news-trending"),
+    path("timeline/", TimelineView.as_view(), name="timeline"),
+    path("authors/<uuid:author_id>/follow/", FollowView.as_view(), name="author-follow"),
     path("news/<int:news_id>/", NewsDetailView.as_view(), name="news-detail"),
     path("comments/", CommentListCreateView.as_view(), name="comment-list-create"),
+    path("comments/bulk/", CommentBulkCreateView.as_view(), name="comment-bulk-create"),
     path("saved-news/", SavedNewsView.as_view(), name="saved-news"),
+    path("saved-news/bulk/", SavedNewsBulkView.as_view(), name="saved-news-bulk"),
+    path("export/news/", NewsExportView.as_view(), name="news-export"),
+    path("export/comments/", CommentExportView.as_view(), name="comment-export"),
+    path("export/saved-news/", SavedNewsExportView.as_view(), name="saved-news-export"),
+    path("async/news/", async_views.news_list, name="async-news-list"),
+    path("async/news/<int:news_id>/", async_views.news_detail, name="async-news-detail"),
+    path("async/comments/", async_views.comment_list, name="async-comment-list"),
+    path("async/saved-news/", async_views.saved_news_list, name="async-saved-news"),
 ]
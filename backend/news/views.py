@@ -1,27 +1,100 @@
+import hashlib
+
 from django.core.exceptions import PermissionDenied, ValidationError
+from django.http import Http404
 from django.shortcuts import get_object_or_404
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_jwt.authentication import JSONWebTokenAuthentication
 
+from news import export
+from news.cache import NewsCache
 from news.manager.comment import CommentManager
 from news.manager.news import NewsManager
 from news.manager.saved_news import SavedNewsManager
 from news.models import News, SavedNews, Comment
-from news.serializers import NewsSerializer, CommentSerializer, SavedNewsSerializer
+from news.manager.timeline import TimelineManager
+from news.manager.trending import TrendingManager
+from news.pagination import (NewsCursorPagination, CommentCursorPagination, SearchCursorPagination,
+                             TrendingCursorPagination, TimelineCursorPagination)
+from news.readers import NewsReader, CommentReader
+from news.search import NewsSearch
+from news.serializers import (NewsSerializer, CommentSerializer, SavedNewsSerializer, NewsSearchSerializer,
+                              BulkCommentSerializer, BulkNewsIdsSerializer)
+from users.authentication import CachedJSONWebTokenAuthentication
+
+
+def with_saved_flags(items, user, keep_id=True):
+    """Fills ``is_saved`` on rendered news, which must carry ``id``; the id is dropped unless ``keep_id``."""
+    saved_ids = SavedNewsManager.get_saved_ids(user, [item["id"] for item in items])
+    items = [{**item, "is_saved": item["id"] in saved_ids} for item in items]
+    if not keep_id:
+        for item in items:
+            del item["id"]
+    return items
+
+
+def make_etag(request, *parts):
+    return hashlib.sha1(":".join(str(part) for part in (request.get_full_path(), *parts)).encode()).hexdigest()
+
+
+def news_metadata(request, news_id):
+    if not hasattr(request, "news_metadata"):
+        request.news_metadata = NewsManager.get_metadata(news_id, request.user)
+    return request.news_metadata
+
+
+def news_etag(request, news_id):
+    # The body is the cached detail entry of this version with the live metadata laid over it.
+    metadata = news_metadata(request, news_id)
+    if metadata is None:
+        return None
+    return make_etag(request, news_id, NewsCache.get_version(), *metadata.values())
+
+
+def comments_metadata(request):
+    if not hasattr(request, "comments_metadata"):
+        news_id = request.query_params.get("news_id")
+        request.comments_metadata = CommentManager.get_metadata(news_id) if news_id else None
+    return request.comments_metadata
+
+
+def comments_etag(request):
+    metadata = comments_metadata(request)
+    if metadata is None:
+        return None
+    return make_etag(request, *metadata.values())
 
 
 class NewsListCreateView(APIView):
     permission_classes = [IsAuthenticated]
-    authentication_classes = [JSONWebTokenAuthentication]
+    authentication_classes = [CachedJSONWebTokenAuthentication]
     serializer_class = NewsSerializer
+    pagination_class = NewsCursorPagination
 
     def get(self, request):
-        news = NewsManager.get_all_news()
-        serializer = self.serializer_class(news, many=True, context={'request': request})
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        try:
+            fields = self.serializer_class.select_fields(request.query_params, self.serializer_class.compact_fields)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        # The saved flags are looked up by id, so the cached page keeps it even when it was not asked for.
+        rendered = fields if "is_saved" not in fields or "id" in fields else ["id", *fields]
+        key = NewsCache.make_key("feed", request.build_absolute_uri())
+        page = NewsCache.get_or_set(key, lambda: self.get_page(request, rendered))
+        if "is_saved" in fields:
+            page["results"] = with_saved_flags(page["results"], request.user, keep_id="id" in fields)
+        response = Response(page, status=status.HTTP_200_OK)
+        response.cache_compressed = True
+        return response
+
+    def get_page(self, request, fields):
+        paginator = self.pagination_class()
+        queryset = NewsReader.values(NewsManager.get_all_news(), fields, paginator.ordering_field, "pk")
+        rows = paginator.paginate_queryset(queryset, request, view=self)
+        return paginator.get_paginated_response(NewsReader.render(rows, fields, {'request': request})).data
 
     def post(self, request):
         serializer = self.serializer_class(data=request.data, context={'request': request})
@@ -33,26 +106,128 @@ class NewsListCreateView(APIView):
 
 class MyNewsListView(APIView):
     permission_classes = [IsAuthenticated]
-    authentication_classes = [JSONWebTokenAuthentication]
+    authentication_classes = [CachedJSONWebTokenAuthentication]
+    serializer_class = NewsSerializer
+    pagination_class = NewsCursorPagination
+
+    def get(self, request):
+        try:
+            fields = self.serializer_class.select_fields(request.query_params, self.serializer_class.compact_fields)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        paginator = self.pagination_class()
+        queryset = NewsReader.values(NewsManager.get_by_user(request.user.id), fields, paginator.ordering_field, "pk")
+        rows = paginator.paginate_queryset(queryset, request, view=self)
+        saved_ids = set()
+        if "is_saved" in fields:
+            saved_ids = SavedNewsManager.get_saved_ids(request.user, [row["id"] for row in rows])
+        return paginator.get_paginated_response(NewsReader.render(rows, fields, {'saved_ids': saved_ids}))
+
+
+class NewsSearchView(APIView):
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [CachedJSONWebTokenAuthentication]
+    serializer_class = NewsSearchSerializer
+    pagination_class = SearchCursorPagination
+
+    def get(self, request):
+        query = request.query_params.get("q", "").strip()
+        if not query:
+            return Response({"error": "q is required"}, status=status.HTTP_400_BAD_REQUEST)
+        paginator = self.pagination_class()
+        news = NewsSearch.paginate(query, paginator, request)
+        saved_ids = SavedNewsManager.get_saved_ids(request.user, [item.id for item in news])
+        serializer = self.serializer_class(news, many=True, context={'request': request, 'saved_ids': saved_ids})
+        return paginator.get_paginated_response(serializer.data)
+
+
+class TrendingNewsView(APIView):
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [CachedJSONWebTokenAuthentication]
+    serializer_class = NewsSerializer
+    pagination_class = TrendingCursorPagination
+
+    def get(self, request):
+        try:
+            fields = self.serializer_class.select_fields(request.query_params, self.serializer_class.compact_fields)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        paginator = self.pagination_class()
+        queryset = NewsReader.values(TrendingManager.get_trending(), fields,
+                                     paginator.ordering_field, paginator.tiebreaker_field)
+        rows = paginator.paginate_queryset(queryset, request, view=self)
+        saved_ids = set()
+        if "is_saved" in fields:
+            saved_ids = SavedNewsManager.get_saved_ids(request.user, [row["id"] for row in rows])
+        results = NewsReader.render(rows, fields, {'request': request, 'saved_ids': saved_ids})
+        return paginator.get_paginated_response(results)
+
+
+class TimelineView(APIView):
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [CachedJSONWebTokenAuthentication]
     serializer_class = NewsSerializer
+    pagination_class = TimelineCursorPagination
 
     def get(self, request):
-        news = NewsManager.get_by_user(request.user.id)
-        serializer = self.serializer_class(news, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        try:
+            fields = self.serializer_class.select_fields(request.query_params, self.serializer_class.compact_fields)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        paginator = self.pagination_class()
+        entries = paginator.paginate_merged(TimelineManager.get_sources(request.user), request)
+        news_ids = [entry["news_id"] for entry in entries]
+        rows = NewsReader.values(News.objects.filter(id__in=news_ids, is_published=True), fields)
+        rows_by_id = {row["id"]: row for row in rows}
+        rows = [rows_by_id[news_id] for news_id in news_ids if news_id in rows_by_id]
+        saved_ids = set()
+        if "is_saved" in fields:
+            saved_ids = SavedNewsManager.get_saved_ids(request.user, list(rows_by_id))
+        results = NewsReader.render(rows, fields, {'request': request, 'saved_ids': saved_ids})
+        return paginator.get_paginated_response(results)
+
+
+class FollowView(APIView):
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [CachedJSONWebTokenAuthentication]
+
+    def post(self, request, author_id):
+        try:
+            created = TimelineManager.follow(request.user, author_id)
+        except ValidationError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"message": "Author followed" if created else "Author already followed", "is_following": True},
+                        status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+    def delete(self, request, author_id):
+        if not TimelineManager.unfollow(request.user, author_id):
+            return Response({"error": "You are not following this author"}, status=status.HTTP_404_NOT_FOUND)
+        return Response({"message": "Author unfollowed", "is_following": False}, status=status.HTTP_204_NO_CONTENT)
 
 
 class NewsDetailView(APIView):
     permission_classes = [IsAuthenticated]
-    authentication_classes = [JSONWebTokenAuthentication]
+    authentication_classes = [CachedJSONWebTokenAuthentication]
     serializer_class = NewsSerializer
 
+    @method_decorator(condition(etag_func=news_etag))
     def get(self, request, news_id):
-        news = NewsManager.get_by_id(news_id=news_id)
-        if not news:
+        metadata = news_metadata(request, news_id)
+        if not metadata:
             return Response({"error": "News not found"}, status=status.HTTP_404_NOT_FOUND)
-        serializer = self.serializer_class(news)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        data = NewsCache.get_or_set(NewsCache.make_key("detail", news_id), lambda: self.get_data(news_id))
+        # Comments and saves do not bump the cache, so the counters come from the metadata row.
+        response = Response({**data, "comment_count": metadata["comment_count"], "save_count": metadata["save_count"],
+                             "is_saved": metadata["is_saved"]}, status=status.HTTP_200_OK)
+        response.cache_compressed = True
+        return response
+
+    def get_data(self, news_id):
+        fields = self.serializer_class.select_fields({})
+        row = NewsReader.values(News.objects.filter(id=news_id), fields).first()
+        if row is None:
+            raise Http404
+        return NewsReader.render([row], fields)[0]
 
     def put(self, request, news_id):
         news = NewsManager.get_by_id(news_id=news_id)
@@ -78,16 +253,20 @@ class NewsDetailView(APIView):
 
 class CommentListCreateView(APIView):
     permission_classes = [IsAuthenticated]
-    authentication_classes = [JSONWebTokenAuthentication]
+    authentication_classes = [CachedJSONWebTokenAuthentication]
     serializer_class = CommentSerializer
+    pagination_class = CommentCursorPagination
 
+    @method_decorator(condition(etag_func=comments_etag))
     def get(self, request):
         news_id = request.query_params.get("news_id")
         if not news_id:
             return Response({"error": "news_id is required"}, status=status.HTTP_400_BAD_REQUEST)
-        comments = CommentManager.get_by_news(news_id)
-        serializer = self.serializer_class(comments, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        paginator = self.pagination_class()
+        queryset = CommentReader.values(CommentManager.get_by_news(news_id), CommentReader.fields,
+                                        paginator.ordering_field, "pk")
+        rows = paginator.paginate_queryset(queryset, request, view=self)
+        return paginator.get_paginated_response(CommentReader.render(rows, CommentReader.fields))
 
     def post(self, request):
         serializer = self.serializer_class(data=request.data)
@@ -109,9 +288,25 @@ class CommentListCreateView(APIView):
         return Response({"message": "Comment deleted successfully"}, status=status.HTTP_204_NO_CONTENT)
 
 
+class CommentBulkCreateView(APIView):
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [CachedJSONWebTokenAuthentication]
+    serializer_class = BulkCommentSerializer
+
+    def post(self, request):
+        serializer = self.serializer_class(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        results = CommentManager.bulk_create(request.user, serializer.validated_data["comments"])
+        for result in results:
+            if "comment" in result:
+                result["comment"] = CommentSerializer(result["comment"]).data
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+
 class SavedNewsView(APIView):
     permission_classes = [IsAuthenticated]
-    authentication_classes = [JSONWebTokenAuthentication]
+    authentication_classes = [CachedJSONWebTokenAuthentication]
     serializer_class = SavedNewsSerializer
 
     def post(self, request):
@@ -152,3 +347,94 @@ class SavedNewsView(APIView):
             return Response({"error": str(e)}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class SavedNewsBulkView(APIView):
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [CachedJSONWebTokenAuthentication]
+    serializer_class = BulkNewsIdsSerializer
+
+    def post(self, request):
+        serializer = self.serializer_class(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        results = SavedNewsManager.bulk_save(request.user, serializer.validated_data["news_ids"])
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+    def delete(self, request):
+        serializer = self.serializer_class(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        results = SavedNewsManager.bulk_unsave(request.user, serializer.validated_data["news_ids"])
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+
+class NewsExportView(APIView):
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [CachedJSONWebTokenAuthentication]
+    serializer_class = NewsSerializer
+
+    def get(self, request):
+        try:
+            news = export.filter_queryset(NewsManager.get_exportable(request.user), request, "published_at")
+            is_published = export.parse_bool(request.query_params.get("is_published"), "is_published")
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        author = request.query_params.get("author")
+        if author:
+            news = news.filter(author__username=author)
+        if is_published is not None:
+            news = news.filter(is_published=is_published)
+
+        def serialize(chunk):
+            saved_ids = SavedNewsManager.get_saved_ids(request.user, [item.id for item in chunk])
+            return self.serializer_class(chunk, many=True, context={'request': request, 'saved_ids': saved_ids}).data
+
+        return export.streaming_response(request, export.stream(news, serialize), "news")
+
+
+class CommentExportView(APIView):
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [CachedJSONWebTokenAuthentication]
+    serializer_class = CommentSerializer
+
+    def get(self, request):
+        try:
+            comments = export.filter_queryset(
+                Comment.objects.filter(news__in=NewsManager.get_exportable(request.user)).select_related("user"),
+                request, "created_at",
+            )
+            news_id = request.query_params.get("news_id")
+            if news_id and not news_id.isdigit():
+                raise ValueError("news_id must be a news id")
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if news_id:
+            comments = comments.filter(news_id=int(news_id))
+        author = request.query_params.get("author")
+        if author:
+            comments = comments.filter(user__username=author)
+        return export.streaming_response(
+            request, export.stream(comments, lambda chunk: self.serializer_class(chunk, many=True).data), "comments"
+        )
+
+
+class SavedNewsExportView(APIView):
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [CachedJSONWebTokenAuthentication]
+    serializer_class = SavedNewsSerializer
+
+    def get(self, request):
+        try:
+            saved_news = export.filter_queryset(SavedNewsManager.get_saved_news(request.user), request, "saved_at")
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        author = request.query_params.get("author")
+        if author:
+            saved_news = saved_news.filter(news__author__username=author)
+
+        def serialize(chunk):
+            saved_ids = {item.news_id for item in chunk}
+            return self.serializer_class(chunk, many=True, context={'request': request, 'saved_ids': saved_ids}).data
+
+        return export.streaming_response(request, export.stream(saved_news, serialize), "saved-news")
@@ -0,0 +1,155 @@
+import threading
+import time
+
+import jwt
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.utils.crypto import constant_time_compare, salted_hmac
+from django.utils.translation import gettext as _
+from rest_framework import exceptions
+from rest_framework_jwt.authentication import JSONWebTokenAuthentication
+from rest_framework_jwt.settings import api_settings
+from rest_framework_jwt.utils import jwt_payload_handler as default_jwt_payload_handler
+
+from .models import Users
+
+jwt_decode_handler = api_settings.JWT_DECODE_HANDLER
+jwt_get_username_from_payload = api_settings.JWT_PAYLOAD_GET_USERNAME_HANDLER
+
+
+def password_fingerprint(password):
+    return salted_hmac("users.authentication.password_fingerprint", password).hexdigest()[:16]
+
+
+def jwt_payload_handler(user):
+    """Adds a fingerprint of the password hash, so changing the password revokes the tokens issued before."""
+    payload = default_jwt_payload_handler(user)
+    payload["pwd"] = password_fingerprint(user.password)
+    return payload
+
+
+def check_password_fingerprint(payload, password):
+    # Tokens issued before fingerprints were added carry none; they stay valid until they expire.
+    fingerprint = payload.get("pwd")
+    if fingerprint is not None and not constant_time_compare(fingerprint, password_fingerprint(password)):
+        raise exceptions.AuthenticationFailed(_('Signature has expired.'))
+
+
+class AsyncJSONWebTokenAuthentication(JSONWebTokenAuthentication):
+    """JWT authentication usable from async views, resolving the user with the async ORM."""
+
+    @staticmethod
+    def decode_payload(jwt_value):
+        try:
+            return jwt_decode_handler(jwt_value)
+        except jwt.ExpiredSignature:
+            raise exceptions.AuthenticationFailed(_('Signature has expired.'))
+        except jwt.DecodeError:
+            raise exceptions.AuthenticationFailed(_('Error decoding signature.'))
+        except jwt.InvalidTokenError:
+            raise exceptions.AuthenticationFailed()
+
+    async def aauthenticate(self, request):
+        jwt_value = self.get_jwt_value(request)
+        if jwt_value is None:
+            return None
+        payload = self.decode_payload(jwt_value)
+        username = jwt_get_username_from_payload(payload)
+        if not username:
+            raise exceptions.AuthenticationFailed(_('Invalid payload.'))
+        user = await Users.objects.filter(username=username).afirst()
+        if user is None:
+            raise exceptions.AuthenticationFailed(_('Invalid signature.'))
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(_('User account is disabled.'))
+        check_password_fingerprint(payload, user.password)
+        return user, jwt_value
+
+
+class UserAuthCache:
+    """
+    Short-lived cache of authenticated users, keyed by user id and a per-user version.
+
+    Bumping the version (on deactivation, password or permission changes)
+    makes every cached copy of the user unreachable at once. Versions live in
+    the "shared" cache so a bump reaches every process; the users themselves
+    may stay in a process-local cache. Hit and miss counts are flushed to the
+    shared cache every ``flush_every`` lookups, so ``auth_cache_stats`` sees all workers.
+    """
+    flush_every = 100
+    stats_keys = ("users:auth-cache:hits", "users:auth-cache:misses")
+    _lock = threading.Lock()
+    _pending = {"hits": 0, "misses": 0}
+
+    @staticmethod
+    def version_key(user_id):
+        return f"users:auth-version:{user_id}"
+
+    @staticmethod
+    def user_key(user_id):
+        return f"users:auth:{user_id}"
+
+    @staticmethod
+    def get(user_id):
+        shared = caches["shared"]
+        version = shared.get(UserAuthCache.version_key(user_id))
+        if version is None:
+            shared.add(UserAuthCache.version_key(user_id), int(time.time() * 1000), timeout=None)
+            version = shared.get(UserAuthCache.version_key(user_id))
+        cached = cache.get(UserAuthCache.user_key(user_id))
+        if cached and cached[0] == version:
+            UserAuthCache.record("hits")
+            return version, cached[1]
+        UserAuthCache.record("misses")
+        return version, None
+
+    @staticmethod
+    def set(user_id, version, user):
+        cache.set(UserAuthCache.user_key(user_id), (version, user), timeout=settings.USER_AUTH_CACHE_TIMEOUT)
+
+    @staticmethod
+    def invalidate(user_id):
+        shared = caches["shared"]
+        try:
+            shared.incr(UserAuthCache.version_key(user_id))
+        except ValueError:
+            shared.set(UserAuthCache.version_key(user_id), int(time.time() * 1000), timeout=None)
+
+    @staticmethod
+    def record(outcome):
+        with UserAuthCache._lock:
+            UserAuthCache._pending[outcome] += 1
+            if sum(UserAuthCache._pending.values()) < UserAuthCache.flush_every:
+                return
+            pending = dict(UserAuthCache._pending)
+            UserAuthCache._pending.update(hits=0, misses=0)
+        shared = caches["shared"]
+        for key, outcome_name in zip(UserAuthCache.stats_keys, ("hits", "misses")):
+            if pending[outcome_name]:
+                if not shared.add(key, pending[outcome_name], timeout=None):
+                    shared.incr(key, pending[outcome_name])
+
+    @staticmethod
+    def stats():
+        totals = caches["shared"].get_many(UserAuthCache.stats_keys)
+        hits = totals.get(UserAuthCache.stats_keys[0], 0) + UserAuthCache._pending["hits"]
+        misses = totals.get(UserAuthCache.stats_keys[1], 0) + UserAuthCache._pending["misses"]
+        total = hits + misses
+        return {"hits": hits, "misses": misses, "hit_rate": hits / total if total else 0.0}
+
+
+class CachedJSONWebTokenAuthentication(JSONWebTokenAuthentication):
+    """JWT authentication that serves the resolved user from UserAuthCache when possible."""
+
+    def authenticate_credentials(self, payload):
+        user_id = payload.get("user_id")
+        if not user_id:
+            return super().authenticate_credentials(payload)
+        version, user = UserAuthCache.get(user_id)
+        if user is None:
+            user = super().authenticate_credentials(payload)
+            UserAuthCache.set(user_id, version, user)
+        elif not user.is_active:
+            raise exceptions.AuthenticationFailed(_('User account is disabled.'))
+        check_password_fingerprint(payload, user.password)
+        return user
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from users.authentication import UserAuthCache
+
+
+class Command(BaseCommand):
+    help = "Show the hit rate of the cached JWT user lookup, aggregated across processes."
+
+    def handle(self, *args, **options):
+        stats = UserAuthCache.stats()
+        self.stdout.write(
+            f"hits={stats['hits']} misses={stats['misses']} hit_rate={stats['hit_rate']:.1%}"
+        )
@@ -0,0 +1,50 @@
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client, override_settings
+
+from config.benchmarking import isolated_caches
+from users.managers import AuthManager
+from users.models import Users
+
+
+class Command(BaseCommand):
+    help = "Measure logins per second per core for session and stateless logins and for token refresh/verify."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--password", default="benchmark123")
+
+    def handle(self, *args, **options):
+        # The user and the sessions the logins write are rolled back, and the caches are private to the run.
+        with isolated_caches(), transaction.atomic():
+            self.run(options["iterations"], options["password"])
+            transaction.set_rollback(True)
+
+    def run(self, iterations, password):
+        user = Users.objects.create_user(username=f"bm{uuid.uuid4().hex[:16]}", password=password)
+        token = AuthManager.generate_token(user)
+        credentials = {"username": user.username, "password": password}
+        cases = (
+            ("login (session)", "/login/", credentials, False),
+            ("login (stateless)", "/login/", credentials, True),
+            ("token refresh", "/token/refresh/", {"token": token}, True),
+            ("token verify", "/token/verify/", {"token": token}, True),
+        )
+        for label, path, data, stateless in cases:
+            with override_settings(AUTH_STATELESS=stateless, THROTTLE_ENABLED=False):
+                rate = self.per_core_rate(Client(), path, data, iterations)
+            self.stdout.write(f"{label:<18} {rate:10.1f}/s per core")
+
+    @staticmethod
+    def per_core_rate(client, path, data, iterations):
+        # CPU time rather than wall time, so the result is per core whatever the database latency.
+        client.post(path, data, content_type="application/json")
+        started = time.process_time()
+        for _ in range(iterations):
+            response = client.post(path, data, content_type="application/json")
+            if response.status_code != 200:
+                raise CommandError(f"{path} returned {response.status_code}: {response.content[:200]!r}")
+        return iterations / (time.process_time() - started)
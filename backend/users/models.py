@@ -30,6 +30,8 @@ class Users(AbstractBaseUser, PermissionsMixin):
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
     is_superuser = models.BooleanField(default=False)
+    follower_count = models.PositiveIntegerField(default=0)
+    timeline_pull = models.BooleanField(default=False)
 
     objects = UserManager()
 
@@ -42,3 +44,15 @@ class Users(AbstractBaseUser, PermissionsMixin):
     class Meta:
         db_table = "users"
         indexes = [models.Index(fields=["username"])]
+
+
+class Follow(models.Model):
+    follower = models.ForeignKey(Users, on_delete=models.CASCADE, related_name="following")
+    author = models.ForeignKey(Users, on_delete=models.CASCADE, related_name="followers")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ("follower", "author")
+
+    def __str__(self) -> str:
+        return f"{self.follower.username} follows {self.author.username}"
@@ -1,5 +1,7 @@
-from rest_framework import serializers
+from rest_framework import exceptions, serializers
 from django.contrib.auth import authenticate
+from rest_framework_jwt.serializers import RefreshJSONWebTokenSerializer, VerifyJSONWebTokenSerializer
+from .authentication import CachedJSONWebTokenAuthentication
 from .models import Users
 
 
@@ -38,3 +40,21 @@ class UserLoginSerializer(serializers.Serializer):
             raise serializers.ValidationError("This account is inactive.")
         data["user"] = user
         return data
+
+
+class CachedUserCheckMixin:
+    """Resolves the user of a token through UserAuthCache, so refresh and verify usually skip the database."""
+
+    def _check_user(self, payload):
+        try:
+            return CachedJSONWebTokenAuthentication().authenticate_credentials(payload)
+        except exceptions.AuthenticationFailed as e:
+            raise serializers.ValidationError(e.detail)
+
+
+class TokenRefreshSerializer(CachedUserCheckMixin, RefreshJSONWebTokenSerializer):
+    pass
+
+
+class TokenVerifySerializer(CachedUserCheckMixin, VerifyJSONWebTokenSerializer):
+    pass
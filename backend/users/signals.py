@@ -0,0 +1,35 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import UserAuthCache
+from .models import Users
+
+
+def invalidate(user_id):
+    # Bumping before the commit would let a concurrent miss cache the old row under the new version.
+    transaction.on_commit(lambda: UserAuthCache.invalidate(user_id))
+
+
+@receiver(post_save, sender=Users)
+def invalidate_on_save(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) <= {"last_login"}:
+        return
+    invalidate(instance.pk)
+
+
+@receiver(post_delete, sender=Users)
+def invalidate_on_delete(sender, instance, **kwargs):
+    invalidate(instance.pk)
+
+
+@receiver(m2m_changed, sender=Users.groups.through)
+@receiver(m2m_changed, sender=Users.user_permissions.through)
+def invalidate_on_permissions_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith("post_"):
+        return
+    if not reverse:
+        invalidate(instance.pk)
+    elif pk_set:
+        for user_id in pk_set:
+            invalidate(user_id)
@@ -1,3 +1,102 @@
-from django.test import TestCase
+import io
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.sessions.models import Session
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from users.authentication import UserAuthCache
+from users.managers import AuthManager
+from users.models import Users
+
+
+class TokenTests(TestCase):
+    def setUp(self):
+        self.user = Users.objects.create_user(username="reader", password="secret123")
+        self.client = APIClient()
+
+    def test_stateless_login_skips_the_session(self):
+        response = self.client.post("/login/", {"username": "reader", "password": "secret123"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Session.objects.exists())
+        with override_settings(AUTH_STATELESS=False):
+            self.client.post("/login/", {"username": "reader", "password": "secret123"}, format="json")
+        self.assertTrue(Session.objects.exists())
+
+    def test_refresh_and_verify_do_not_hash_passwords(self):
+        token = AuthManager.generate_token(self.user)
+        with mock.patch("django.contrib.auth.base_user.check_password", side_effect=AssertionError("hashed")):
+            response = self.client.post("/token/verify/", {"token": token}, format="json")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data["token"], token)
+            response = self.client.post("/token/refresh/", {"token": token}, format="json")
+            self.assertEqual(response.status_code, 200)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['token']}")
+        self.assertEqual(self.client.get("/news/").status_code, 200)
+
+    def test_tokens_of_inactive_users_are_rejected(self):
+        token = AuthManager.generate_token(self.user)
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.post("/token/refresh/", {"token": token}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.post("/token/verify/", {"token": "garbage"}, format="json").status_code, 400)
+
+
+class UserAuthCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        caches["shared"].clear()
+        self.user = Users.objects.create_user(username="reader", password="secret123")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AuthManager.generate_token(self.user)}")
+
+    def test_cached_user_skips_the_query(self):
+        self.client.get("/saved-news/")
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get("/saved-news/").status_code, 200)
+
+    def test_deactivation_rejects_a_cached_token_once_committed(self):
+        self.assertEqual(self.client.get("/saved-news/").status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+            # Until the commit, a miss could still cache the old row, so the version must not move yet.
+            self.assertIsNotNone(UserAuthCache.get(self.user.pk)[1])
+        self.assertEqual(self.client.get("/saved-news/").status_code, 401)
+
+    def test_password_change_rejects_older_tokens(self):
+        self.assertEqual(self.client.get("/saved-news/").status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.set_password("changed123")
+            self.user.save()
+        self.assertEqual(self.client.get("/saved-news/").status_code, 401)
+        response = self.client.post("/token/refresh/", {"token": AuthManager.generate_token(self.user)}, format="json")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['token']}")
+        self.assertEqual(self.client.get("/saved-news/").status_code, 200)
+
+    def test_stats_are_flushed_to_the_shared_cache(self):
+        UserAuthCache._pending.update(hits=0, misses=0)
+        with mock.patch.object(UserAuthCache, "flush_every", 2):
+            for _ in range(4):
+                self.client.get("/saved-news/")
+        self.assertEqual(caches["shared"].get_many(UserAuthCache.stats_keys),
+                         {"users:auth-cache:hits": 3, "users:auth-cache:misses": 1})
+        out = io.StringIO()
+        call_command("auth_cache_stats", stdout=out)
+        self.assertIn("hits=3 misses=1", out.getvalue())
+
+
+class BenchmarkLoginCommandTests(TestCase):
+    def test_leaves_no_user_and_no_cache_entries_behind(self):
+        cache.set("unrelated", 1)
+        caches["shared"].set("unrelated", 1)
+        out = io.StringIO()
+        call_command("benchmark_login", iterations=1, stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 4)
+        self.assertFalse(Users.objects.exists())
+        self.assertFalse(Session.objects.exists())
+        self.assertEqual(cache.get("unrelated"), 1)
+        self.assertEqual(caches["shared"].get("unrelated"), 1)
@@ -2,8 +2,11 @@ from rest_framework.views import APIView
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework import status
+from django.conf import settings
 from django.contrib.auth import login
-from .serializers import UserRegistrationSerializer, UserLoginSerializer
+from rest_framework_jwt.views import RefreshJSONWebToken, VerifyJSONWebToken
+from .serializers import (UserRegistrationSerializer, UserLoginSerializer, TokenRefreshSerializer,
+                          TokenVerifySerializer)
 from .managers import AuthManager
 
 
@@ -15,7 +18,8 @@ class RegisterView(APIView):
         serializer = self.serializer_class(data=request.data)
         if serializer.is_valid():
             user = serializer.save()
-            login(request, user)
+            if not settings.AUTH_STATELESS:
+                login(request, user)
             token = AuthManager.generate_token(user)
             return Response({"token": token}, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -29,7 +33,16 @@ class LoginView(APIView):
         serializer = self.serializer_class(data=request.data)
         if serializer.is_valid():
             user = serializer.validated_data["user"]
-            login(request, user)
+            if not settings.AUTH_STATELESS:
+                login(request, user)
             token = AuthManager.generate_token(user)
             return Response({"token": token}, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class TokenRefreshView(RefreshJSONWebToken):
+    serializer_class = TokenRefreshSerializer
+
+
+class TokenVerifyView(VerifyJSONWebToken):
+    serializer_class = TokenVerifySerializer